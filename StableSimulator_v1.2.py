@@ -1,1077 +1,87 @@
-import streamlit as st
-import random
-from collections import defaultdict
-
-# =========================
-# GLOBAL STORAGE
-# =========================
-
-if "BANNERS" not in st.session_state:
-    st.session_state.BANNERS = {}
-
-if "ARCHIVED_BANNERS" not in st.session_state:
-    st.session_state.ARCHIVED_BANNERS = set()
-
-if "ALIASES" not in st.session_state:
-    st.session_state.ALIASES = {}
-
-# Pity counters
-if "GLOBAL_LEG_PITY" not in st.session_state:
-    st.session_state.GLOBAL_LEG_PITY = 0
-
-if "WINGED_PEGASUS_PITY" not in st.session_state:
-    st.session_state.WINGED_PEGASUS_PITY = 0
-
-if "TACK_EPIC_PITY" not in st.session_state:
-    st.session_state.TACK_EPIC_PITY = 0
-
-if "TACK_LEG_PITY" not in st.session_state:
-    st.session_state.TACK_LEG_PITY = 0
-
-if "VALENTINE_LEG_PITY" not in st.session_state:
-    st.session_state.VALENTINE_LEG_PITY = 0
-
-# Flutterwing pity
-if "FLUTTERWING_EPIC_PITY" not in st.session_state:
-    st.session_state.FLUTTERWING_EPIC_PITY = 0
-
-if "FLUTTERWING_LEG_PITY" not in st.session_state:
-    st.session_state.FLUTTERWING_LEG_PITY = 0
-
-# Persistence
-if "PERSIST_PITY" not in st.session_state:
-    st.session_state.PERSIST_PITY = True
-
-# Stats
-if "TOTAL_PULLS" not in st.session_state:
-    st.session_state.TOTAL_PULLS = 0
-
-if "CUMULATIVE_COUNTS" not in st.session_state:
-    st.session_state.CUMULATIVE_COUNTS = defaultdict(int)
-
-if "RARITY_COUNTS" not in st.session_state:
-    st.session_state.RARITY_COUNTS = defaultdict(int)
-
-
-# =========================
-# UTILITIES
-# =========================
-
-def normalize(text):
-    return text.lower().replace(" ", "").replace("_", "")
-
-
-def register_banner(name, items, aliases=None, archived=False):
-    st.session_state.BANNERS[name] = items
-
-    if archived:
-        st.session_state.ARCHIVED_BANNERS.add(name)
-
-    if aliases:
-        for a in aliases:
-            st.session_state.ALIASES[normalize(a)] = name
-
-    st.session_state.ALIASES[normalize(name)] = name
-
-
-def resolve_banner(input_name):
-    return st.session_state.ALIASES.get(normalize(input_name))
-
-
-def weighted_choice(items):
-    total = sum(w for _, _, w in items)
-    r = random.uniform(0, total)
-
-    upto = 0
-    for name, rarity, weight in items:
-        if upto + weight >= r:
-            return name, rarity
-        upto += weight
-
-    return items[-1][0], items[-1][1]
-
-
-def get_chance(items, item_name):
-    item = next((i for i in items if i[0] == item_name), None)
-    if not item:
-        return 0.0
-
-    _, _, weight = item
-    return round(weight, 2)
-
-
-# =========================
-# PULL LOGIC
-# =========================
-
-def pull_once(banner):
-
-    items = st.session_state.BANNERS[banner]
-    pity_used = False
-
-    # ---------- TACK ----------
-    if banner == "Tack Banner":
-
-        st.session_state.TACK_EPIC_PITY += 1
-        st.session_state.TACK_LEG_PITY += 1
-
-        legendary = [i for i in items if i[1] == "Legendary"]
-        epic = [i for i in items if i[1] == "Epic"]
-
-        if st.session_state.TACK_LEG_PITY >= 90:
-            name, rarity = weighted_choice(legendary)
-            st.session_state.TACK_LEG_PITY = 0
-            st.session_state.TACK_EPIC_PITY = 0
-            pity_used = True
-
-        elif st.session_state.TACK_EPIC_PITY >= 10:
-            name, rarity = weighted_choice(epic)
-            st.session_state.TACK_EPIC_PITY = 0
-            pity_used = True
-
-        else:
-            name, rarity = weighted_choice(items)
-
-            if rarity == "Legendary":
-                st.session_state.TACK_LEG_PITY = 0
-                st.session_state.TACK_EPIC_PITY = 0
-
-            elif rarity == "Epic":
-                st.session_state.TACK_EPIC_PITY = 0
-
-        info = {
-            f"{name} Chance": get_chance(items, name),
-            "Epic Pity": st.session_state.TACK_EPIC_PITY,
-            "Legendary Pity": st.session_state.TACK_LEG_PITY
-        }
-
-        return name, rarity, pity_used, info
-
-
-    # ---------- VALENTINE ----------
-    if banner == "Valentine Stable":
-
-        FEATURED = "Lovestruck Unicorn"
-        st.session_state.VALENTINE_LEG_PITY += 1
-
-        featured_item = next((i for i in items if i[0] == FEATURED), None)
-
-        if st.session_state.VALENTINE_LEG_PITY >= 25 and featured_item:
-            name, rarity, _ = featured_item
-            st.session_state.VALENTINE_LEG_PITY = 0
-            pity_used = True
-
-        else:
-            name, rarity = weighted_choice(items)
-
-            if name == FEATURED:
-                st.session_state.VALENTINE_LEG_PITY = 0
-
-        info = {
-            f"{name} Chance": get_chance(items, name),
-            "Valentine Pity": st.session_state.VALENTINE_LEG_PITY
-        }
-
-        return name, rarity, pity_used, info
-
-
-    # ---------- WINGED ----------
-    if banner == "Winged Stable":
-
-        st.session_state.WINGED_PEGASUS_PITY += 1
-        flying = [i for i in items if i[1] == "Flying"]
-
-        if st.session_state.WINGED_PEGASUS_PITY >= 10:
-            name, rarity = weighted_choice(flying)
-            st.session_state.WINGED_PEGASUS_PITY = 0
-            pity_used = True
-
-        else:
-            name, rarity = weighted_choice(items)
-
-            if rarity == "Flying":
-                st.session_state.WINGED_PEGASUS_PITY = 0
-
-        info = {
-            f"{name} Chance": get_chance(items, name),
-            "Winged Pity": st.session_state.WINGED_PEGASUS_PITY
-        }
-
-        return name, rarity, pity_used, info
-
-
-    # ---------- MAJESTIC / MYSTICAL ----------
-    if banner in ("Majestic Stable", "Mystical Stable"):
-
-        epic_key = f"{banner}_EPIC"
-        leg_key = f"{banner}_LEG"
-
-        st.session_state.setdefault(epic_key, 0)
-        st.session_state.setdefault(leg_key, 0)
-
-        st.session_state[epic_key] += 1
-        st.session_state[leg_key] += 1
-
-        legendary = [i for i in items if "Legendary" in i[1] or "Fantasy" in i[1]]
-        epic = [i for i in items if i[1] == "Epic"]
-
-        if st.session_state[leg_key] >= 20:
-            name, rarity = weighted_choice(legendary)
-            st.session_state[leg_key] = 0
-            st.session_state[epic_key] = 0
-            pity_used = True
-
-        elif st.session_state[epic_key] >= 10:
-            name, rarity = weighted_choice(epic)
-            st.session_state[epic_key] = 0
-            pity_used = True
-
-        else:
-            name, rarity = weighted_choice(items)
-
-            if "Legendary" in rarity or "Fantasy" in rarity:
-                st.session_state[leg_key] = 0
-
-            if rarity == "Epic":
-                st.session_state[epic_key] = 0
-
-        info = {
-            f"{name} Chance": get_chance(items, name),
-            "Epic Pity": st.session_state[epic_key],
-            "Legendary Pity": st.session_state[leg_key]
-        }
-
-        return name, rarity, pity_used, info
-
-
-    # ---------- FLUTTERWING ----------
-    if banner == "Flutterwing Stable":
-
-        st.session_state.FLUTTERWING_EPIC_PITY += 1
-        st.session_state.FLUTTERWING_LEG_PITY += 1
-
-        featured = [i for i in items if i[1] == "Featured Fantasy"]
-        high_tier = [i for i in items if i[1] in ("Legendary", "Fantasy")]
-
-        if st.session_state.FLUTTERWING_LEG_PITY >= 25 and featured:
-            name, rarity = weighted_choice(featured)
-            st.session_state.FLUTTERWING_LEG_PITY = 0
-            st.session_state.FLUTTERWING_EPIC_PITY = 0
-            pity_used = True
-
-        elif st.session_state.FLUTTERWING_EPIC_PITY >= 10:
-            name, rarity = weighted_choice(high_tier)
-            st.session_state.FLUTTERWING_EPIC_PITY = 0
-            pity_used = True
-
-        else:
-            name, rarity = weighted_choice(items)
-
-            if rarity in ("Legendary", "Fantasy"):
-                st.session_state.FLUTTERWING_EPIC_PITY = 0
-
-            if rarity == "Featured Fantasy":
-                st.session_state.FLUTTERWING_LEG_PITY = 0
-
-        info = {
-            f"{name} Chance": get_chance(items, name),
-            "High Tier Pity": st.session_state.FLUTTERWING_EPIC_PITY,
-            "Featured Pity": st.session_state.FLUTTERWING_LEG_PITY
-        }
-
-        return name, rarity, pity_used, info
-
-
-    # ---------- DEFAULT ----------
-    name, rarity = weighted_choice(items)
-
-    info = {
-        f"{name} Chance": get_chance(items, name)
-    }
+import os
+import tempfile
+import time
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
 
-    return name, rarity, pity_used, info
+import streamlit as st
 
+from stablesim.cache import ResultCache
+from stablesim.core import Simulator, default_registry
+from stablesim.render import TableRenderer, page_count
+from stablesim.valuation import RARITY_VALUES, rank_banners
 
 # =========================
-# MULTI PULL
+# SIMULATOR
 # =========================
+# Everything the engine needs lives on one plain-Python object; the UI
+# below only reads and drives it. The banner registry is built once per
+# process and shared by every session; a session only owns its state.
+# So is the result cache: identical seeded runs from any session reuse it.
+# Set STABLESIM_RESULT_CACHE to a file path to keep it in sqlite.
+#
+# The first render only needs the registry (read from the compiled
+# catalog cache) and a fresh session, neither of which imports numpy.
+# The engine, exports, odds and campaign code load on first use.
 
-def multi_pull(banner, amount, highlights=None, advanced=False):
-
-    highlights = highlights or []
-    results = []
-
-    if not st.session_state.PERSIST_PITY:
-        for key in st.session_state.keys():
-            if "PITY" in key or "_EPIC" in key or "_LEG" in key:
-                st.session_state[key] = 0
-
-    for i in range(1, amount + 1):
-
-        name, rarity, pity_used, pull_info = pull_once(banner)
-
-        st.session_state.TOTAL_PULLS += 1
-        st.session_state.CUMULATIVE_COUNTS[name] += 1
-        st.session_state.RARITY_COUNTS[rarity] += 1
-
-        # ---------- MARK (PITY / HIGHLIGHT) ----------
-        mark_parts = []
-        if pity_used:
-            mark_parts.append("PITY")
-
-        if highlights:
-            for h in highlights:
-                if h.lower() in name.lower():
-                    mark_parts.append("*")
-                    break
-
-        mark = "".join(mark_parts)
+@st.cache_resource
+def load_registry():
+    return default_registry()
 
-        chance = pull_info.get(f"{name} Chance", 0)
-        owned = st.session_state.CUMULATIVE_COUNTS[name]
 
-        if advanced:
-            results.append([i, name, rarity, chance, owned, mark])
-        else:
-            results.append([i, name, rarity, mark])
+@st.cache_resource
+def load_result_cache():
+    return ResultCache(path=os.environ.get("STABLESIM_RESULT_CACHE"))
 
-    return results
 
-# =========================
-# PART 2 — Creatures of the Night (ARCHIVED)
-# =========================
+if "SIM" not in st.session_state:
+    st.session_state.SIM = Simulator(load_registry(), cache=load_result_cache())
 
-cotn_items = [
-
-    # ---- FEATURED FANTASY ----
-    ("Lycan Diremane", "Fantasy", 2.50),
-    ("Transylvanian Nightstalker", "Fantasy", 2.50),
-    ("Haunted Arabian", "Fantasy", 0.83),
-    ("Skeleton Puppy", "Fantasy", 0.83),
-
-    # ---- FANTASY ----
-    ("Aesir Friesian", "Fantasy", 0.83),
-    ("Legendary Clydesdale", "Fantasy", 0.83),
-    ("Aratiri Clydesdale", "Fantasy", 0.83),
-    ("Sahar Arabian", "Fantasy", 0.83),
-    ("Maelstrom Clydesdale", "Fantasy", 0.83),
-    ("Night Glow", "Fantasy", 0.83),
-    ("Glacier Storm", "Fantasy", 0.83),
-    ("Atlantean Arabian", "Fantasy", 0.83),
-    ("Cosmic Mustang", "Fantasy", 0.83),
-    ("Wildfin Triton", "Fantasy", 0.83),
-
-    # ---- LEGENDARY ----
-    ("Black Shire", "Legendary", 0.62),
-    ("Rose Grey Clydesdale", "Legendary", 0.62),
-    ("Red Roan Clydesdale", "Legendary", 0.62),
-    ("Black Overo Shire", "Legendary", 0.62),
-    ("Strawberry Roan Clydesdale", "Legendary", 0.62),
-    ("Blue Roan Shire", "Legendary", 0.62),
-    ("Gray Tobiano Shire", "Legendary", 0.62),
-    ("White Shire", "Legendary", 0.62),
-    ("Sorrel Rabicano Clydesdale", "Legendary", 0.62),
-
-    ("Blood Bay Friesian Sport", "Legendary", 0.62),
-    ("Grey Friesian Sport", "Legendary", 0.62),
-    ("Palomino Friesian Sport", "Legendary", 0.62),
-    ("Leopard Cross Friesian Sport", "Legendary", 0.62),
-    ("Brown Pintaloosa Friesian Sport", "Legendary", 0.62),
-    ("Grey Pintaloosa Friesian Sport", "Legendary", 0.62),
-    ("Red Roan Friesian Sport", "Legendary", 0.62),
-    ("Brown Tobiano Friesian Sport", "Legendary", 0.62),
-    ("Sorrel Tobiano Friesian Sport", "Legendary", 0.62),
-    ("Grey Tobiano Friesian Sport", "Legendary", 0.62),
-    ("Piebald Friesian Sport", "Legendary", 0.62),
-
-    ("White Hair Friesian", "Legendary", 0.62),
-    ("Braided Friesian", "Legendary", 0.62),
-    ("Blue Roan Friesian Sport", "Legendary", 0.62),
-    ("Appaloosa Friesian", "Legendary", 0.62),
-    ("Dapple Overo Brown Friesian", "Legendary", 0.62),
-    ("Speckled Overo Friesian", "Legendary", 0.62),
-    ("Peacock Snowcap Friesian", "Legendary", 0.62),
-    ("Tobiano Friesian", "Legendary", 0.62),
-
-    ("Appaloosa Clydesdale", "Legendary", 0.62),
-    ("Appaloosa Shire", "Legendary", 0.62),
-    ("Dapple Grey Clydesdale", "Legendary", 0.62),
-    ("Seal Bay Clydesdale", "Legendary", 0.62),
-
-    # ---- EPIC ----
-    ("Black Snowflake Arabian", "Epic", 0.62),
-    ("Light Bay Arabian", "Epic", 0.88),
-    ("Buckskin Arabian", "Epic", 0.88),
-    ("Silver Dapple Arabian", "Epic", 0.88),
-    ("Rose Grey Arabian", "Epic", 0.88),
-    ("Silver Splashed Pintabian", "Epic", 0.88),
-    ("Black Arabian", "Epic", 0.88),
-    ("Light Brown Pintabian", "Epic", 0.88),
-    ("Grey Tovero Pintabian", "Epic", 0.88),
-    ("Red Dun Arabian", "Epic", 0.88),
-    ("Liver Chestnut Pintabian", "Epic", 0.88),
-
-    ("Bay Dun Kiger", "Epic", 0.88),
-    ("Black Mustang", "Epic", 0.88),
-    ("Grey Rabicano Mustang", "Epic", 0.88),
-    ("Smokey Cream Mustang", "Epic", 0.88),
-    ("Dapple Grey Mustang", "Epic", 0.88),
-    ("Dark Bay Roan Mustang", "Epic", 0.88),
-    ("White Mustang", "Epic", 0.88),
-    ("Grulla Dapple Mustang", "Epic", 0.88),
-    ("Grulla Dun Kiger", "Epic", 0.88),
-    ("Blood Bay Kiger", "Epic", 0.88),
-    ("Bay Mustang", "Epic", 0.88),
-    ("Chestnut Skewbald Mustang", "Epic", 0.88),
-    ("Silver Dapple Kiger", "Epic", 0.88),
-    ("Grey Tobiano Kiger", "Epic", 0.88),
-
-    ("Black Splashed Paint", "Epic", 0.88),
-    ("Black Snowflake Quarter", "Epic", 0.88),
-    ("Gray Overo Paint", "Epic", 0.88),
-    ("Seal Bay Aussie", "Epic", 0.88),
-    ("Buckskin Quarter", "Epic", 0.88),
-    ("Dapple Bay Aussie", "Epic", 0.88),
-    ("Cremello Aussie", "Epic", 0.88),
-    ("Dapple Gray Quarter", "Epic", 0.88),
-    ("Spotted Grey Quarter", "Epic", 0.88),
-    ("Dark Seal Quarter", "Epic", 0.88),
-    ("Dark Bay Aussie", "Epic", 0.88),
-    ("Dark Brown Heart Quarter", "Epic", 0.88),
-    ("Grey Splashed Quarter", "Epic", 0.88),
-    ("Silver Ripple Aussie", "Epic", 0.88),
-    ("Silver Dapple Quarter", "Epic", 0.88),
-    ("White Quarter", "Epic", 0.88),
-    ("Black Sabino Paint", "Epic", 0.88),
-    ("Smokey Black Quarter", "Epic", 0.88),
-    ("Chestnut Tobiano Paint", "Epic", 0.88),
-    ("Grey Chimera Aussie", "Epic", 0.88),
-    ("Champagne Spattered Quarter", "Epic", 0.88),
-    ("Tobiano Grey Aussie", "Epic", 0.88),
-    ("Palomino Quarter", "Epic", 0.88),
-    ("Red Dun Aussie", "Epic", 0.88),
-    ("Perlino Aussie", "Epic", 0.88),
-    ("Rose Grey Quarter", "Epic", 0.88),
-    ("Smokey Seal Quarter", "Epic", 0.88),
-
-    ("Liver Splatter Paint", "Epic", 0.88),
-    ("Liver Tobiano Paint", "Epic", 0.88),
-
-    ("Grease Spot Pintabian", "Epic", 0.88),
-    ("Grey Tobiano Pintabian", "Epic", 0.88),
-    ("Appaloosa Pintabian", "Epic", 0.88),
-
-    ("Dapple Seal Arabian", "Epic", 0.88),
-    ("Dapple Overo Brown Arabian", "Epic", 0.88),
-    ("Steel Grey Arabian", "Epic", 0.88),
-    ("Dapple Brown Arabian", "Epic", 0.88),
-    ("Overo Palomino Arabian", "Epic", 0.88),
-    ("Overo Brown Arabian", "Epic", 0.88),
-    ("Dapple Overo Grey Arabian", "Epic", 0.88),
-
-    ("Appaloosa American Quarter", "Epic", 0.88),
-    ("Drenched Appaloosa Quarter", "Epic", 0.88),
-    ("Champagne Dapple Aussie", "Epic", 0.88),
-    ("Tobiano Buckskin Paint", "Epic", 0.88),
-    ("Perlino Dun Paint", "Epic", 0.88),
-    ("Chestnut Faded Paint", "Epic", 0.88),
-    ("Splashed Black Paint", "Epic", 0.88),
-    ("Cream Tricolor Quarter", "Epic", 0.88),
-    ("Grey Tricolor Paint", "Epic", 0.88),
-]
-
-register_banner(
-    "Creatures of the Night",
-    cotn_items,
-    aliases=["cotn", "night", "creatures"],
-    archived=True
-)
+sim = st.session_state.SIM
 
-# =========================
-# PART 3 — Mystical Stable
-# =========================
 
-mystical_items = [
-
-    # ---- FANTASY (10%) ----
-    ("Aesir Friesian", "Fantasy", 1.00),
-    ("Legendary Clydesdale", "Fantasy", 1.00),
-    ("Aratiri Clydesdale", "Fantasy", 1.00),
-    ("Sahar Arabian", "Fantasy", 1.00),
-    ("Maelstrom Clydesdale", "Fantasy", 1.00),
-    ("Night Glow", "Fantasy", 1.00),
-    ("Glacier Storm", "Fantasy", 1.00),
-    ("Atlantean Arabian", "Fantasy", 1.00),
-    ("Cosmic Mustang", "Fantasy", 1.00),
-    ("Wildfin Triton", "Fantasy", 1.00),
-
-    # ---- LEGENDARY (20%) ----
-    ("Black Shire", "Legendary", 0.62),
-    ("Rose Grey Clydesdale", "Legendary", 0.62),
-    ("Red Roan Clydesdale", "Legendary", 0.62),
-    ("Black Overo Shire", "Legendary", 0.62),
-    ("Strawberry Roan Clydesdale", "Legendary", 0.62),
-    ("Blue Roan Shire", "Legendary", 0.62),
-    ("Gray Tobiano Shire", "Legendary", 0.62),
-    ("White Shire", "Legendary", 0.62),
-    ("Sorrel Rabicano Clydesdale", "Legendary", 0.62),
-
-    ("Blood Bay Friesian Sport", "Legendary", 0.62),
-    ("Grey Friesian Sport", "Legendary", 0.62),
-    ("Palomino Friesian Sport", "Legendary", 0.62),
-    ("Leopard Cross Friesian Sport", "Legendary", 0.62),
-    ("Brown Pintaloosa Friesian Sport", "Legendary", 0.62),
-    ("Grey Pintaloosa Friesian Sport", "Legendary", 0.62),
-    ("Red Roan Friesian Sport", "Legendary", 0.62),
-    ("Brown Tobiano Friesian Sport", "Legendary", 0.62),
-    ("Sorrel Tobiano Friesian Sport", "Legendary", 0.62),
-    ("Grey Tobiano Friesian Sport", "Legendary", 0.62),
-    ("Piebald Friesian Sport", "Legendary", 0.62),
-
-    ("White Hair Friesian", "Legendary", 0.62),
-    ("Braided Friesian", "Legendary", 0.62),
-    ("Blue Roan Friesian Sport", "Legendary", 0.62),
-    ("Appaloosa Friesian", "Legendary", 0.62),
-    ("Dapple Overo Brown Friesian", "Legendary", 0.62),
-    ("Speckled Overo Friesian", "Legendary", 0.62),
-    ("Peacock Snowcap Friesian", "Legendary", 0.62),
-    ("Tobiano Friesian", "Legendary", 0.62),
-
-    ("Appaloosa Clydesdale", "Legendary", 0.62),
-    ("Appaloosa Shire", "Legendary", 0.62),
-    ("Dapple Grey Clydesdale", "Legendary", 0.62),
-    ("Seal Bay Clydesdale", "Legendary", 0.62),
-
-    # ---- EPIC (70%) ----
-    ("Black Snowflake Arabian", "Epic", 0.95),
-    ("Light Bay Arabian", "Epic", 0.95),
-    ("Buckskin Arabian", "Epic", 0.95),
-    ("Silver Dapple Arabian", "Epic", 0.95),
-    ("Rose Grey Arabian", "Epic", 0.95),
-    ("Silver Splashed Pintabian", "Epic", 0.95),
-    ("Black Arabian", "Epic", 0.95),
-    ("Light Brown Pintabian", "Epic", 0.95),
-    ("Grey Tovero Pintabian", "Epic", 0.95),
-    ("Red Dun Arabian", "Epic", 0.95),
-    ("Liver Chestnut Pintabian", "Epic", 0.95),
-
-    ("Bay Dun Kiger", "Epic", 0.95),
-    ("Black Mustang", "Epic", 0.95),
-    ("Grey Rabicano Mustang", "Epic", 0.95),
-    ("Smokey Cream Mustang", "Epic", 0.95),
-    ("Dapple Grey Mustang", "Epic", 0.95),
-    ("Dark Bay Roan Mustang", "Epic", 0.95),
-    ("White Mustang", "Epic", 0.95),
-    ("Grulla Dapple Mustang", "Epic", 0.95),
-    ("Grulla Dun Kiger", "Epic", 0.95),
-    ("Blood Bay Kiger", "Epic", 0.95),
-    ("Bay Mustang", "Epic", 0.95),
-    ("Chestnut Skewbald Mustang", "Epic", 0.95),
-    ("Silver Dapple Kiger", "Epic", 0.95),
-    ("Grey Tobiano Kiger", "Epic", 0.95),
-
-    ("Black Splashed Paint", "Epic", 0.95),
-    ("Black Snowflake Quarter", "Epic", 0.95),
-    ("Gray Overo Paint", "Epic", 0.95),
-    ("Seal Bay Aussie", "Epic", 0.95),
-    ("Buckskin Quarter", "Epic", 0.95),
-    ("Dapple Bay Aussie", "Epic", 0.95),
-    ("Cremello Aussie", "Epic", 0.95),
-    ("Dapple Gray Quarter", "Epic", 0.95),
-    ("Spotted Grey Quarter", "Epic", 0.95),
-    ("Dark Seal Quarter", "Epic", 0.95),
-    ("Dark Bay Aussie", "Epic", 0.95),
-    ("Dark Brown Heart Quarter", "Epic", 0.95),
-    ("Grey Splashed Quarter", "Epic", 0.95),
-    ("Silver Ripple Aussie", "Epic", 0.95),
-    ("Silver Dapple Quarter", "Epic", 0.95),
-    ("White Quarter", "Epic", 0.95),
-    ("Black Sabino Paint", "Epic", 0.95),
-    ("Smokey Black Quarter", "Epic", 0.95),
-    ("Chestnut Tobiano Paint", "Epic", 0.95),
-    ("Grey Chimera Aussie", "Epic", 0.95),
-    ("Champagne Spattered Quarter", "Epic", 0.95),
-    ("Tobiano Grey Aussie", "Epic", 0.95),
-    ("Palomino Quarter", "Epic", 0.95),
-    ("Red Dun Aussie", "Epic", 0.95),
-    ("Perlino Aussie", "Epic", 0.95),
-    ("Rose Grey Quarter", "Epic", 0.95),
-    ("Smokey Seal Quarter", "Epic", 0.95),
-
-    ("Liver Splatter Paint", "Epic", 0.95),
-    ("Liver Tobiano Paint", "Epic", 0.95),
-
-    ("Grease Spot Pintabian", "Epic", 0.95),
-    ("Grey Tobiano Pintabian", "Epic", 0.95),
-    ("Appaloosa Pintabian", "Epic", 0.95),
-
-    ("Dapple Seal Arabian", "Epic", 0.95),
-    ("Dapple Overo Brown Arabian", "Epic", 0.95),
-    ("Steel Grey Arabian", "Epic", 0.95),
-    ("Dapple Brown Arabian", "Epic", 0.95),
-    ("Overo Palomino Arabian", "Epic", 0.95),
-    ("Overo Brown Arabian", "Epic", 0.95),
-    ("Dapple Overo Grey Arabian", "Epic", 0.95),
-
-    ("Appaloosa American Quarter", "Epic", 0.95),
-    ("Drenched Appaloosa Quarter", "Epic", 0.95),
-    ("Champagne Dapple Aussie", "Epic", 0.95),
-    ("Tobiano Buckskin Paint", "Epic", 0.95),
-    ("Perlino Dun Paint", "Epic", 0.95),
-    ("Chestnut Faded Paint", "Epic", 0.95),
-    ("Splashed Black Paint", "Epic", 0.95),
-    ("Cream Tricolor Quarter", "Epic", 0.95),
-    ("Grey Tricolor Paint", "Epic", 0.95),
-]
-
-register_banner(
-    "Mystical Stable",
-    mystical_items,
-    aliases=["mystical", "ms"]
-)
+# Prepared exports are files in one directory shared by all sessions.
+# A session keeps only its latest one, and files older than EXPORT_TTL
+# are swept at startup and on every new export, so sessions that close
+# with an export prepared don't leave it behind for good.
 
-# =========================
-# PART 4 — Majestic Stable
-# =========================
+EXPORT_DIR = Path(os.environ.get("STABLESIM_EXPORT_DIR") or Path(tempfile.gettempdir()) / "stablesim-exports")
+EXPORT_TTL = 3600
 
-majestic_items = [
-
-    # ---- FEATURED LEGENDARY ----
-    ("White Hair Friesian", "Legendary", 0.53),
-    ("Braided Friesian", "Legendary", 0.53),
-    ("Blue Roan Friesian Sport", "Legendary", 0.53),
-    ("Blood Bay Friesian Sport", "Legendary", 0.53),
-    ("Grey Friesian Sport", "Legendary", 0.53),
-    ("Palomino Friesian Sport", "Legendary", 0.53),
-    ("Leopard Cross Friesian Sport", "Legendary", 0.53),
-    ("Brown Pintaloosa Friesian Sport", "Legendary", 0.53),
-    ("Grey Pintaloosa Friesian Sport",  "Legendary", 0.53),
-    ("Red Roan Friesian Sport", "Legendary", 0.53),
-    ("Brown Tobiano Friesian Sport", "Legendary", 0.53),
-    ("Sorrel Tobiano Friesian Sport", "Legendary", 0.53),
-    ("Grey Tobiano Friesian Sport", "Legendary", 0.53),
-    ("Piebald Friesian Sport", "Legendary", 0.53),
-    ("Appaloosa Friesian", "Legendary", 0.53),
-    ("Dapple Overo Brown Friesian", "Legendary", 0.53),
-    ("Speckled Overo Friesian", "Legendary", 0.53),
-    ("Peacock Snowcap Friesian", "Legendary", 0.53),
-    ("Tobiano Friesian", "Legendary", 0.53),
-
-    # ---- REGULAR LEGENDARY ----
-    ("Black Shire", "Legendary", 0.62),
-    ("Rose Grey Clydesdale", "Legendary", 0.62),
-    ("Red Roan Clydesdale", "Legendary", 0.62),
-    ("Black Overo Shire", "Legendary", 0.62),
-    ("Strawberry Roan Clydesdale", "Legendary", 0.62),
-    ("Blue Roan Shire", "Legendary", 0.62),
-    ("Gray Tobiano Shire", "Legendary", 0.62),
-    ("White Shire", "Legendary", 0.62),
-    ("Sorrel Rabicano Clydesdale", "Legendary", 0.62),
-
-    ("Blood Bay Friesian Sport", "Legendary", 0.62),
-    ("Grey Friesian Sport", "Legendary", 0.62),
-    ("Palomino Friesian Sport", "Legendary", 0.62),
-    ("Leopard Cross Friesian Sport", "Legendary", 0.62),
-    ("Brown Pintaloosa Friesian Sport", "Legendary", 0.62),
-    ("Grey Pintaloosa Friesian Sport", "Legendary", 0.62),
-    ("Red Roan Friesian Sport", "Legendary", 0.62),
-    ("Brown Tobiano Friesian Sport", "Legendary", 0.62),
-    ("Sorrel Tobiano Friesian Sport", "Legendary", 0.62),
-    ("Grey Tobiano Friesian Sport", "Legendary", 0.62),
-    ("Piebald Friesian Sport", "Legendary", 0.62),
-
-    ("White Hair Friesian", "Legendary", 0.62),
-    ("Braided Friesian", "Legendary", 0.62),
-    ("Blue Roan Friesian Sport", "Legendary", 0.62),
-    ("Appaloosa Friesian", "Legendary", 0.62),
-    ("Dapple Overo Brown Friesian", "Legendary", 0.62),
-    ("Speckled Overo Friesian", "Legendary", 0.62),
-    ("Peacock Snowcap Friesian", "Legendary", 0.62),
-    ("Tobiano Friesian", "Legendary", 0.62),
-
-    ("Appaloosa Clydesdale", "Legendary", 0.62),
-    ("Appaloosa Shire", "Legendary", 0.62),
-    ("Dapple Grey Clydesdale", "Legendary", 0.62),
-    ("Seal Bay Clydesdale", "Legendary", 0.62),
-
-    # ---- EPIC ----
-    ("Black Snowflake Arabian", "Epic", 0.95),
-    ("Light Bay Arabian", "Epic", 0.95),
-    ("Buckskin Arabian", "Epic", 0.95),
-    ("Silver Dapple Arabian", "Epic", 0.95),
-    ("Rose Grey Arabian", "Epic", 0.95),
-    ("Silver Splashed Pintabian", "Epic", 0.95),
-    ("Black Arabian", "Epic", 0.95),
-    ("Light Brown Pintabian", "Epic", 0.95),
-    ("Grey Tovero Pintabian", "Epic", 0.95),
-    ("Red Dun Arabian", "Epic", 0.95),
-    ("Liver Chestnut Pintabian", "Epic", 0.95),
-
-    ("Bay Dun Kiger", "Epic", 0.95),
-    ("Black Mustang", "Epic", 0.95),
-    ("Grey Rabicano Mustang", "Epic", 0.95),
-    ("Smokey Cream Mustang", "Epic", 0.95),
-    ("Dapple Grey Mustang", "Epic", 0.95),
-    ("Dark Bay Roan Mustang", "Epic", 0.95),
-    ("White Mustang", "Epic", 0.95),
-    ("Grulla Dapple Mustang", "Epic", 0.95),
-    ("Grulla Dun Kiger", "Epic", 0.95),
-    ("Blood Bay Kiger", "Epic", 0.95),
-    ("Bay Mustang", "Epic", 0.95),
-    ("Chestnut Skewbald Mustang", "Epic", 0.95),
-    ("Silver Dapple Kiger", "Epic", 0.95),
-    ("Grey Tobiano Kiger", "Epic", 0.95),
-
-    ("Black Splashed Paint", "Epic", 0.95),
-    ("Black Snowflake Quarter", "Epic", 0.95),
-    ("Gray Overo Paint", "Epic", 0.95),
-    ("Seal Bay Aussie", "Epic", 0.95),
-    ("Buckskin Quarter", "Epic", 0.95),
-    ("Dapple Bay Aussie", "Epic", 0.95),
-    ("Cremello Aussie", "Epic", 0.95),
-    ("Dapple Gray Quarter", "Epic", 0.95),
-    ("Spotted Grey Quarter", "Epic", 0.95),
-    ("Dark Seal Quarter", "Epic", 0.95),
-    ("Dark Bay Aussie", "Epic", 0.95),
-    ("Dark Brown Heart Quarter", "Epic", 0.95),
-    ("Grey Splashed Quarter", "Epic", 0.95),
-    ("Silver Ripple Aussie", "Epic", 0.95),
-    ("Silver Dapple Quarter", "Epic", 0.95),
-    ("White Quarter", "Epic", 0.95),
-    ("Black Sabino Paint", "Epic", 0.95),
-    ("Smokey Black Quarter", "Epic", 0.95),
-    ("Chestnut Tobiano Paint", "Epic", 0.95),
-    ("Grey Chimera Aussie", "Epic", 0.95),
-    ("Champagne Spattered Quarter", "Epic", 0.95),
-    ("Tobiano Grey Aussie", "Epic", 0.95),
-    ("Palomino Quarter", "Epic", 0.95),
-    ("Red Dun Aussie", "Epic", 0.95),
-    ("Perlino Aussie", "Epic", 0.95),
-    ("Rose Grey Quarter", "Epic", 0.95),
-    ("Smokey Seal Quarter", "Epic", 0.95),
-
-    ("Liver Splatter Paint", "Epic", 0.95),
-    ("Liver Tobiano Paint", "Epic", 0.95),
-
-    ("Grease Spot Pintabian", "Epic", 0.95),
-    ("Grey Tobiano Pintabian", "Epic", 0.95),
-    ("Appaloosa Pintabian", "Epic", 0.95),
-
-    ("Dapple Seal Arabian", "Epic", 0.95),
-    ("Dapple Overo Brown Arabian", "Epic", 0.95),
-    ("Steel Grey Arabian", "Epic", 0.95),
-    ("Dapple Brown Arabian", "Epic", 0.95),
-    ("Overo Palomino Arabian", "Epic", 0.95),
-    ("Overo Brown Arabian", "Epic", 0.95),
-    ("Dapple Overo Grey Arabian", "Epic", 0.95),
-
-    ("Appaloosa American Quarter", "Epic", 0.95),
-    ("Drenched Appaloosa Quarter", "Epic", 0.95),
-    ("Champagne Dapple Aussie", "Epic", 0.95),
-    ("Tobiano Buckskin Paint", "Epic", 0.95),
-    ("Perlino Dun Paint", "Epic", 0.95),
-    ("Chestnut Faded Paint", "Epic", 0.95),
-    ("Splashed Black Paint", "Epic", 0.95),
-    ("Cream Tricolor Quarter", "Epic", 0.95),
-    ("Grey Tricolor Paint", "Epic", 0.95),
-]
-
-register_banner(
-    "Majestic Stable",
-    majestic_items,
-    aliases=["majestic", "mj"]
-)
 
-# =========================
-# PART 5 — Winged Stable
-# =========================
+def sweep_exports():
+    cutoff = time.time() - EXPORT_TTL
+    for path in EXPORT_DIR.glob("export-*"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except FileNotFoundError:
+            pass
 
-winged_items = [
-
-    # ---- FLYING ----
-    ("Azure Friesian Pegasus", "Flying", 2.00),
-    ("Dark Friesian Pegasus", "Flying", 2.00),
-    ("White Friesian Pegasus", "Flying", 2.00),
-    ("Dapple Brown Friesian Pegasus", "Flying", 2.00),
-    ("Dapple Grey Friesian Pegasus", "Flying", 2.00),
-
-    # ---- FANTASY ----
-    ("Aesir Friesian", "Fantasy", 3.00),
-    ("Legendary Clydesdale", "Fantasy", 3.00),
-    ("Aratiri Clydesdale", "Fantasy", 3.00),
-    ("Sahar Arabian", "Fantasy", 3.00),
-    ("Maelstrom Clydesdale", "Fantasy", 3.00),
-    ("Night Glow", "Fantasy", 3.00),
-    ("Glacier Storm", "Fantasy", 3.00),
-    ("Atlantean Arabian", "Fantasy", 3.00),
-    ("Cosmic Mustang", "Fantasy", 3.00),
-    ("Wildfin Triton", "Fantasy", 3.00),
-
-    # ---- LEGENDARY ----
-    ("Black Shire", "Legendary", 1.87),
-    ("Rose Grey Clydesdale", "Legendary", 1.87),
-    ("Red Roan Clydesdale", "Legendary", 1.87),
-    ("Strawberry Roan Clydesdale", "Legendary", 1.87),
-    ("Blue Roan Shire", "Legendary", 1.87),
-    ("Gray Tobiano Shire", "Legendary", 1.87),
-    ("White Shire", "Legendary", 1.87),
-    ("Sorrel Rabicano Clydesdale", "Legendary", 1.87),
-
-    ("Blood Bay Friesian Sport", "Legendary", 1.87),
-    ("Grey Friesian Sport", "Legendary", 1.87),
-    ("Palomino Friesian Sport", "Legendary", 1.87),
-    ("Leopard Cross Friesian Sport", "Legendary", 1.87),
-    ("Brown Pintaloosa Friesian Sport", "Legendary", 1.87),
-    ("Grey Pintaloosa Friesian Sport", "Legendary", 1.87),
-    ("Red Roan Friesian Sport", "Legendary", 1.87),
-    ("Brown Tobiano Friesian Sport", "Legendary", 1.87),
-    ("Sorrel Tobiano Friesian Sport", "Legendary", 1.87),
-    ("Grey Tobiano Friesian Sport", "Legendary", 1.87),
-    ("Piebald Friesian Sport", "Legendary", 1.87),
-
-    ("White Hair Friesian", "Legendary", 1.87),
-    ("Braided Friesian", "Legendary", 1.87),
-    ("Blue Roan Friesian Sport", "Legendary", 1.87),
-    ("Appaloosa Friesian", "Legendary", 1.87),
-    ("Dapple Overo Brown Friesian", "Legendary", 1.87),
-    ("Speckled Overo Friesian", "Legendary", 1.87),
-    ("Peacock Snowcap Friesian", "Legendary", 1.87),
-    ("Tobiano Friesian", "Legendary", 1.87),
-
-    ("Appaloosa Clydesdale", "Legendary", 1.87),
-    ("Appaloosa Shire", "Legendary", 1.87),
-    ("Dapple Grey Clydesdale", "Legendary", 1.87),
-    ("Seal Bay Clydesdale", "Legendary", 1.87),
-]
-
-register_banner(
-    "Winged Stable",
-    winged_items,
-    aliases=["winged", "pegasus", "fly"]
-)
 
-# =========================
-# PART 7 — Valentine Stable (Limited)
-# =========================
+@st.cache_resource
+def export_dir():
+    # once per process: clears what earlier runs left
+    EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+    sweep_exports()
+    return EXPORT_DIR
 
-valentine_items = [
-
-    # ---- FEATURED (5%) ----
-    ("Lovestruck Unicorn", "Featured Fantasy", 5.00),
-
-    # ---- FANTASY (20%) ----
-    ("Aesir Friesian", "Fantasy", 2.00),
-    ("Legendary Clydesdale", "Fantasy", 2.00),
-    ("Aratiri Clydesdale", "Fantasy", 2.00),
-    ("Sahar Arabian", "Fantasy", 2.00),
-    ("Maelstrom Clydesdale", "Fantasy", 2.00),
-    ("Night Glow", "Fantasy", 2.00),
-    ("Glacier Storm", "Fantasy", 2.00),
-    ("Atlantean Arabian", "Fantasy", 2.00),
-    ("Cosmic Mustang", "Fantasy", 2.00),
-    ("Wildfin Triton", "Fantasy", 2.00),
-
-    # ---- LEGENDARY (25%) ----
-    ("Black Shire", "Legendary", 0.78),
-    ("Rose Grey Clydesdale", "Legendary", 0.78),
-    ("Red Roan Clydesdale", "Legendary", 0.78),
-    ("Black Overo Shire", "Legendary", 0.78),
-    ("Strawberry Roan Clydesdale", "Legendary", 0.78),
-    ("Blue Roan Shire", "Legendary", 0.78),
-    ("Gray Tobiano Shire", "Legendary", 0.78),
-    ("White Shire", "Legendary", 0.78),
-    ("Sorrel Rabicano Clydesdale", "Legendary", 0.78),
-
-    ("Blood Bay Friesian Sport", "Legendary", 0.78),
-    ("Grey Friesian Sport", "Legendary", 0.78),
-    ("Palomino Friesian Sport", "Legendary", 0.78),
-    ("Leopard Cross Friesian Sport", "Legendary", 0.78),
-    ("Brown Pintaloosa Friesian Sport", "Legendary", 0.78),
-    ("Grey Pintaloosa Friesian Sport", "Legendary", 0.78),
-    ("Red Roan Friesian Sport", "Legendary", 0.78),
-    ("Brown Tobiano Friesian Sport", "Legendary", 0.78),
-    ("Sorrel Tobiano Friesian Sport", "Legendary", 0.78),
-    ("Grey Tobiano Friesian Sport", "Legendary", 0.78),
-    ("Piebald Friesian Sport", "Legendary", 0.78),
-
-    ("White Hair Friesian", "Legendary", 0.78),
-    ("Braided Friesian", "Legendary", 0.78),
-    ("Blue Roan Friesian Sport", "Legendary", 0.78),
-    ("Appaloosa Friesian", "Legendary", 0.78),
-    ("Dapple Overo Brown Friesian", "Legendary", 0.78),
-    ("Speckled Overo Friesian", "Legendary", 0.78),
-    ("Peacock Snowcap Friesian", "Legendary", 0.78),
-    ("Tobiano Friesian", "Legendary", 0.78),
-
-    ("Appaloosa Clydesdale", "Legendary", 0.78),
-    ("Appaloosa Shire", "Legendary", 0.78),
-    ("Dapple Grey Clydesdale", "Legendary", 0.78),
-    ("Seal Bay Clydesdale", "Legendary", 0.78),
-
-    # ---- EPIC (50%) ----
-    # (all same chance so same weight)
-
-    ("Black Snowflake Arabian", "Epic", 0.68),
-    ("Light Bay Arabian", "Epic", 0.68),
-    ("Buckskin Arabian", "Epic", 0.68),
-    ("Silver Dapple Arabian", "Epic", 0.68),
-    ("Rose Grey Arabian", "Epic", 0.68),
-    ("Silver Splashed Pintabian", "Epic", 0.68),
-    ("Black Arabian", "Epic", 0.68),
-    ("Light Brown Pintabian", "Epic", 0.68),
-    ("Grey Tovero Pintabian", "Epic", 0.68),
-    ("Red Dun Arabian", "Epic", 0.68),
-    ("Liver Chestnut Pintabian", "Epic", 0.68),
-
-    ("Bay Dun Kiger", "Epic", 0.68),
-    ("Black Mustang", "Epic", 0.68),
-    ("Grey Rabicano Mustang", "Epic", 0.68),
-    ("Smokey Cream Mustang", "Epic", 0.68),
-    ("Dapple Grey Mustang", "Epic", 0.68),
-    ("Dark Bay Roan Mustang", "Epic", 0.68),
-    ("White Mustang", "Epic", 0.68),
-    ("Grulla Dapple Mustang", "Epic", 0.68),
-    ("Grulla Dun Kiger", "Epic", 0.68),
-    ("Blood Bay Kiger", "Epic", 0.68),
-    ("Bay Mustang", "Epic", 0.68),
-    ("Chestnut Skewbald Mustang", "Epic", 0.68),
-    ("Silver Dapple Kiger", "Epic", 0.68),
-    ("Grey Tobiano Kiger", "Epic", 0.68),
-
-    ("Black Splashed Paint", "Epic", 0.68),
-    ("Black Snowflake Quarter", "Epic", 0.68),
-    ("Gray Overo Paint", "Epic", 0.68),
-    ("Seal Bay Aussie", "Epic", 0.68),
-    ("Buckskin Quarter", "Epic", 0.68),
-    ("Dapple Bay Aussie", "Epic", 0.68),
-    ("Cremello Aussie", "Epic", 0.68),
-    ("Dapple Gray Quarter", "Epic", 0.68),
-    ("Spotted Grey Quarter", "Epic", 0.68),
-    ("Dark Seal Quarter", "Epic", 0.68),
-    ("Dark Bay Aussie", "Epic", 0.68),
-    ("Dark Brown Heart Quarter", "Epic", 0.68),
-    ("Grey Splashed Quarter", "Epic", 0.68),
-    ("Silver Ripple Aussie", "Epic", 0.68),
-    ("Silver Dapple Quarter", "Epic", 0.68),
-    ("White Quarter", "Epic", 0.68),
-]
-
-register_banner(
-    "Valentine Stable",
-    valentine_items,
-    aliases=["valentine", "love", "vday"]
-)
 
-flutterwing_items = [
-    # ---- FEATURED FANTASY ----
-    ("Flutterwing Arabian", "Featured Fantasy", 5.00),
-
-    # ---- FANTASY ----
-    ("Aesir Friesian", "Fantasy", 3.00),
-    ("Legendary Clydesdale", "Fantasy", 3.00),
-    ("Aratiri Clydesdale", "Fantasy", 3.00),
-    ("Sahar Arabian", "Fantasy", 3.00),
-    ("Maelstrom Clydesdale", "Fantasy", 3.00),
-    ("Night Glow", "Fantasy", 3.00),
-    ("Glacier Storm", "Fantasy", 3.00),
-    ("Atlantean Arabian", "Fantasy", 3.00),
-    ("Cosmic Mustang", "Fantasy", 3.00),
-    ("Wildfin Triton", "Fantasy", 3.00),
-
-    # ---- LEGENDARY ----
-    ("Black Shire", "Legendary", 1.25),
-    ("Rose Grey Clydesdale", "Legendary", 1.25),
-    ("Red Roan Clydesdale", "Legendary", 1.25),
-    ("Black Overo Shire", "Legendary", 1.25),
-    ("Strawberry Roan Clydesdale", "Legendary", 1.25),
-    ("Blue Roan Shire", "Legendary", 1.25),
-    ("Gray Tobiano Shire", "Legendary", 1.25),
-    ("White Shire", "Legendary", 1.25),
-    ("Sorrel Rabicano Clydesdale", "Legendary", 1.25),
-    ("Blood Bay Friesian Sport", "Legendary", 1.25),
-    ("Grey Friesian Sport", "Legendary", 1.25),
-    ("Palomino Friesian Sport", "Legendary", 1.25),
-    ("Leopard Cross Friesian Sport", "Legendary", 1.25),
-    ("Brown Pintaloosa Friesian Sport", "Legendary", 1.25),
-    ("Grey Pintaloosa Friesian Sport", "Legendary", 1.25),
-    ("Red Roan Friesian Sport", "Legendary", 1.25),
-    ("Brown Tobiano Friesian Sport", "Legendary", 1.25),
-    ("Sorrel Tobiano Friesian Sport", "Legendary", 1.25),
-    ("Grey Tobiano Friesian Sport", "Legendary", 1.25),
-    ("Piebald Friesian Sport", "Legendary", 1.25),
-    ("White Hair Friesian", "Legendary", 1.25),
-    ("Braided Friesian", "Legendary", 1.25),
-    ("Blue Roan Friesian Sport", "Legendary", 1.25),
-    ("Appaloosa Friesian", "Legendary", 1.25),
-    ("Dapple Overo Brown Friesian", "Legendary", 1.25),
-    ("Speckled Overo Friesian", "Legendary", 1.25),
-    ("Peacock Snowcap Friesian", "Legendary", 1.25),
-    ("Tobiano Friesian", "Legendary", 1.25),
-    ("Appaloosa Clydesdale", "Legendary", 1.25),
-    ("Appaloosa Shire", "Legendary", 1.25),
-    ("Dapple Grey Clydesdale", "Legendary", 1.25),
-    ("Seal Bay Clydesdale", "Legendary", 1.25),
-
-    # ---- EPIC ----
-    ("Black Snowflake Arabian", "Epic", 0.34),
-    ("Light Bay Arabian", "Epic", 0.34),
-    ("Buckskin Arabian", "Epic", 0.34),
-    ("Silver Dapple Arabian", "Epic", 0.34),
-    ("Rose Grey Arabian", "Epic", 0.34),
-    ("Silver Splashed Pintabian", "Epic", 0.34),
-    ("Black Arabian", "Epic", 0.34),
-    ("Light Brown Pintabian", "Epic", 0.34),
-    ("Grey Tovero Pintabian", "Epic", 0.34),
-    ("Red Dun Arabian", "Epic", 0.34),
-    # … add the rest of Epic items as in your table …
-]
-
-register_banner(
-    "Flutterwing Stable",
-    flutterwing_items,
-    aliases=["flutterwing", "fw"]
-)
+export_dir()
 
-# =========================
-# PART 6 — Tack Banner
-# =========================
 
-tack_items = [
-
-    # ---- LEGENDARY (1%) ----
-    ("Bridle", "Legendary", 0.03),
-    ("Saddle Pad", "Legendary", 0.03),
-    ("Saddle", "Legendary", 0.03),
-    ("Horseshoes", "Legendary", 0.03),
-
-    # ---- EPIC (6%) ----
-    ("Bridle", "Epic", 0.15),
-    ("Saddle Pad", "Epic", 0.15),
-    ("Saddle", "Epic", 0.15),
-    ("Horseshoes", "Epic", 0.15),
-
-    # ---- RARE (93%) ----
-    ("Bridle", "Rare", 4.65),
-    ("Saddle Pad", "Rare", 4.65),
-    ("Saddle", "Rare", 4.65),
-    ("Horseshoes", "Rare", 4.65),
-]
-
-register_banner(
-    "Tack Banner",
-    tack_items,
-    aliases=["tack", "gear", "equipment"]
-)
+def discard_export():
+    export = st.session_state.pop("EXPORT", None)
+    if export:
+        try:
+            os.remove(export[0])
+        except FileNotFoundError:
+            pass
 
 # =========================
 # STREAMLIT UI (FULL FIXED + COUNTDOWN)
 # =========================
 
-import streamlit as st
-import io, csv, time
-from collections import defaultdict
-from datetime import datetime, timezone, timedelta
-
 st.set_page_config(layout="wide")
 st.title("Horse Stable Simulator 🐴")
 
@@ -1192,34 +202,67 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-# ---------------- SESSION ----------------
-
-if "LAST_RESULTS" not in st.session_state:
-    st.session_state.LAST_RESULTS = None
-if "TOTAL_PULLS" not in st.session_state:
-    st.session_state.TOTAL_PULLS = 0
-if "CUMULATIVE_COUNTS" not in st.session_state:
-    st.session_state.CUMULATIVE_COUNTS = defaultdict(int)
-if "RARITY_COUNTS" not in st.session_state:
-    st.session_state.RARITY_COUNTS = defaultdict(int)
-if "BANNERS" not in st.session_state:
-    st.session_state.BANNERS = {}
-if "PERSIST_PITY" not in st.session_state:
-    st.session_state.PERSIST_PITY = True
-
 # ---------------- SIDEBAR ----------------
 
 st.sidebar.header("Settings")
 advanced_mode = st.sidebar.checkbox("Advanced Mode")
-st.session_state.PERSIST_PITY = st.sidebar.checkbox(
+if advanced_mode:
+    for warning in sim.registry.warnings:
+        st.sidebar.caption(f"⚠️ {warning}")
+sim.state.persist_pity = st.sidebar.checkbox(
     "Persistent Pity",
-    value=st.session_state.PERSIST_PITY
+    value=sim.state.persist_pity
 )
+
+seed_text = st.sidebar.text_input(
+    "Seed",
+    value=str(sim.state.stream.seed),
+    help="Same seed and pity, same pulls"
+)
+if seed_text.strip() != str(sim.state.stream.seed):
+    try:
+        seed = int(seed_text)
+    except ValueError:
+        seed = -1
+    if seed < 0:
+        st.sidebar.error("Seed must be a non-negative whole number")
+    else:
+        sim.reseed(seed)
+if st.sidebar.button("🔀 New seed"):
+    sim.reseed()
+    st.rerun()
+if advanced_mode:
+    st.sidebar.caption(f"Pulls drawn from this seed: {sim.state.stream.position:,}")
+    cache_stats = sim.cache.stats()
+    st.sidebar.caption(
+        f"Result cache: {cache_stats['hits']:,} hits · {cache_stats['misses']:,} misses · "
+        f"{cache_stats['entries']} entries ({cache_stats['bytes'] / 1e6:.1f} MB)"
+    )
+
+rarity_values = RARITY_VALUES
+if advanced_mode:
+    with st.sidebar.expander("Rarity values"):
+        rarity_values = {
+            rarity: st.number_input(rarity, min_value=0.0, value=float(value), step=0.5)
+            for rarity, value in RARITY_VALUES.items()
+        }
+
+replay_from = None
+if advanced_mode:
+    saved = sim.state.pity.saved
+    snapshot_name = st.sidebar.text_input("Pity snapshot", value=f"Snapshot {len(saved) + 1}")
+    if st.sidebar.button("💾 Save pity"):
+        sim.state.pity.save(snapshot_name)
+    if saved:
+        replay_from = st.sidebar.selectbox(
+            "Pull from",
+            [None] + list(saved),
+            format_func=lambda label: label or "Current pity"
+        )
+
 if st.sidebar.button("RESET ALL"):
-    st.session_state.TOTAL_PULLS = 0
-    st.session_state.CUMULATIVE_COUNTS.clear()
-    st.session_state.RARITY_COUNTS.clear()
-    st.session_state.LAST_RESULTS = None
+    sim.reset_stats()
+    discard_export()
     st.rerun()
 
 # ---------------- MAIN ----------------
@@ -1229,7 +272,7 @@ col1, col2, col3 = st.columns([2,1,1])
 with col1:
     banner_choice = st.selectbox(
         "Choose a banner",
-        list(st.session_state.BANNERS.keys())
+        list(sim.registry.banners.keys())
     )
 
     # ✅ SHOW COUNTDOWN BELOW SELECTBOX
@@ -1246,97 +289,155 @@ highlights = [h.strip().lower() for h in highlight_input.split(",")] if highligh
 
 # ---------------- TABLE RENDER ----------------
 
+# one renderer per theme + highlight set, so its page cache survives reruns
+renderer_key = (THEME, tuple(highlights))
+if st.session_state.get("RENDERER_KEY") != renderer_key:
+    st.session_state.RENDERER = TableRenderer(RARITY_COLORS, highlights)
+    st.session_state.RENDERER_KEY = renderer_key
+renderer = st.session_state.RENDERER
+
 def render_table(rows, headers):
-    html = "<table>"
-    html += "<tr>" + "".join(f"<th>{h}</th>" for h in headers) + "</tr>"
-    for row in rows:
-        html += "<tr>"
-        for idx, cell in enumerate(row):
-            display = str(cell)
-            if highlights and idx == 1:
-                for kw in highlights:
-                    if kw in display.lower():
-                        display = display.replace(kw, f"<mark>{kw}</mark>")
-            if display in RARITY_COLORS:
-                html += f"<td style='color:{RARITY_COLORS[display]};font-weight:600'>{display}</td>"
-            else:
-                html += f"<td>{display}</td>"
-        html += "</tr>"
-    html += "</table>"
-    st.markdown(html, unsafe_allow_html=True)
+    st.markdown(renderer.table(rows, headers), unsafe_allow_html=True)
 
 # ---------------- PULL BUTTON ----------------
 
 if st.button("🎲 PULL", use_container_width=True):
-    results = multi_pull(
+    sim.multi_pull(
         banner_choice,
         pulls,
         highlights,
-        advanced=advanced_mode
+        advanced=advanced_mode,
+        pity=replay_from
     )
-    st.session_state.LAST_RESULTS = results
+
+# ---------------- RESULTS ----------------
+
+if sim.state.last_results:
+    results = sim.state.last_results
     st.write("### Results")
-    table_data = []
-    if advanced_mode:
+    if len(results[0]) == 6:
         headers = ["#", "Item", "Rarity", "Chance", "Owned", "Mark"]
-        for r in results:
-            table_data.append(r)
     else:
         headers = ["#", "Item", "Rarity", "Mark"]
-        for i,n,rar,m in results:
-            table_data.append([i,n,rar,m])
-    render_table(table_data, headers)
+
+    p1, p2, p3 = st.columns([1, 1, 2])
+    with p1:
+        page_size = st.selectbox("Rows per page", [50, 100, 250, 500], index=1)
+    pages = page_count(len(results), page_size)
+    with p2:
+        page = st.number_input("Page", min_value=1, max_value=pages, value=1)
+    with p3:
+        st.caption(f"{len(results):,} pulls · page {page} of {pages}")
+
+    st.markdown(renderer.page(results, headers, page, page_size), unsafe_allow_html=True)
 
 # ---------------- DOWNLOAD ----------------
 
-if st.session_state.LAST_RESULTS:
-    csv_buffer = io.StringIO()
-    writer = csv.writer(csv_buffer)
-    writer.writerows(st.session_state.LAST_RESULTS)
-    st.download_button(
-        "📥 Download Last Pull CSV",
-        csv_buffer.getvalue(),
-        file_name="last_pull.csv"
-    )
+if sim.state.pulled():
+    from stablesim.export import FORMATS, available_formats, write_export
+
+    export_cols = st.columns([1, 1, 2])
+    export_fmt = export_cols[0].selectbox("Export format", available_formats())
+
+    if export_cols[1].button("📦 Prepare session export"):
+        discard_export()
+        sweep_exports()
+        with tempfile.NamedTemporaryFile(
+            prefix="export-", suffix=f".{export_fmt}", dir=export_dir(), delete=False
+        ) as f:
+            write_export(sim.state.history, f, export_fmt)
+        st.session_state.EXPORT = (f.name, export_fmt, len(sim.state.history))
+
+    export = st.session_state.get("EXPORT")
+    if export and (export[2] != len(sim.state.history) or not os.path.exists(export[0])):
+        # more pulls since it was prepared, or swept for age
+        discard_export()
+    elif export:
+        path, fmt, rows = export
+        # download_button holds the whole file in server memory; only
+        # write_export itself runs in bounded memory
+        with open(path, "rb") as f:
+            export_cols[2].download_button(
+                f"📥 Download {rows:,} pulls ({fmt})",
+                f,
+                file_name=f"stablesim_session.{fmt}",
+                mime=FORMATS[fmt]
+            )
 
 # ---------------- STATS ----------------
 
-if st.session_state.RARITY_COUNTS:
+stats_view = None
+if sim.state.pulled():
     st.write("## 📊 Pull Statistics")
-    total = sum(st.session_state.RARITY_COUNTS.values())
-    for rarity, count in st.session_state.RARITY_COUNTS.items():
-        pct = (count/total)*100
-        color = RARITY_COLORS.get(rarity, TEXT)
-        st.markdown(
-            f"<span style='color:{color};font-weight:600'>{rarity}</span>: {count} ({pct:.1f}%)",
-            unsafe_allow_html=True
+    pulled = list(sim.state.stats.partitions)
+    scopes = pulled + ["Last batch", "All banners"]
+    scope = st.selectbox(
+        "Statistics for",
+        scopes,
+        index=scopes.index(banner_choice) if banner_choice in pulled else len(scopes) - 1
+    )
+    if scope == "All banners":
+        stats_view = sim.state.stats
+    elif scope == "Last batch":
+        stats_view = sim.state.stats.view(batches=[-1])
+    else:
+        stats_view = sim.state.stats.view([scope])
+
+    lines = []
+    for row in stats_view.rarity_rows():
+        color = RARITY_COLORS.get(row["rarity"], TEXT)
+        line = (
+            f"<span style='color:{color};font-weight:600'>{row['rarity']}</span>: "
+            f"{row['count']:,} ({row['share'] * 100:.1f}%, 95% CI {row['low'] * 100:.1f}–{row['high'] * 100:.1f}%)"
         )
+        if advanced_mode:
+            line += f" · expected {row['expected'] * 100:.2f}% (z = {row['z']:+.2f})"
+        lines.append(line)
+    st.markdown("<br>".join(lines), unsafe_allow_html=True)
 
 # ---------------- EXTRA TABLES ----------------
 
 def show_summary():
-    rows = [[r,c] for r,c in st.session_state.RARITY_COUNTS.items()]
-    render_table(rows, ["Rarity","Count"])
+    if stats_view is None:
+        return st.caption("No pulls yet")
+    rows = [
+        [
+            r["rarity"], r["count"], f"{r['share'] * 100:.2f}%",
+            f"{r['low'] * 100:.2f}–{r['high'] * 100:.2f}%",
+            f"{r['expected'] * 100:.2f}%", f"{r['z']:+.2f}"
+        ]
+        for r in stats_view.rarity_rows()
+    ]
+    render_table(rows, ["Rarity","Count","Share","95% CI","Expected","z"])
 
 def show_cumulative():
-    rows = sorted(st.session_state.CUMULATIVE_COUNTS.items(), key=lambda x:-x[1])
-    render_table(rows, ["Item","Count"])
+    if stats_view is None:
+        return st.caption("No pulls yet")
+    render_table(stats_view.top(), ["Item","Count"])
 
 def best_banner():
-    scores = {}
-    for banner, items in st.session_state.BANNERS.items():
-        score = 0
-        for _, rarity, weight in items:
-            if "Legendary" in rarity: score+=weight*5
-            elif "Epic" in rarity: score+=weight*3
-            elif rarity in ("Fantasy","Flying"): score+=weight*2
-            else: score+=weight
-        scores[banner]=round(score,2)
-    rows = sorted(scores.items(), key=lambda x:-x[1])
-    render_table(rows, ["Banner","Score"])
+    rows = [
+        [
+            v["banner"], f"{v['per_pull']:.3f}", f"{v['per_cost']:.4f}",
+            f"{v['pity_lift'] * 100:+.1f}%"
+        ]
+        for v in rank_banners(sim.registry, rarity_values)
+    ]
+    render_table(rows, ["Banner","Value / Pull","Value / Cost","From Pity"])
+
+def show_completion():
+    from stablesim.completion import completion_table
+    rows = [
+        [
+            e["banner"], e["rarity"], e["items"], f"{e['expected']:.0f}",
+            e.get("p90", "—"), e["method"]
+        ]
+        for e in completion_table(sim.registry, cache=sim.cache)
+    ]
+    render_table(rows, ["Banner","Tier","Items","Expected Pulls","90%","Method"])
 
 st.divider()
-c1,c2,c3 = st.columns(3)
+c1,c2,c3,c4 = st.columns(4)
 with c1:
     if st.button("📜 Summary", use_container_width=True):
         show_summary()
@@ -1346,6 +447,103 @@ with c2:
 with c3:
     if st.button("⭐ Best Banner", use_container_width=True):
         best_banner()
+with c4:
+    if st.button("🧩 Completion", use_container_width=True):
+        show_completion()
+
+# ---------------- PULL UNTIL ----------------
+
+with st.expander("⏱️ Pull Until"):
+    sampler = sim.registry.samplers[banner_choice]
+    options = list(sampler.rarity_names) + list(sampler.index)
+    featured = [(sampler.names[i], sampler.rarities[i]) for i in sampler.featured[:1]]
+
+    until_targets = st.multiselect(
+        "Targets",
+        options,
+        default=featured,
+        format_func=lambda o: f"{o} (whole rarity)" if isinstance(o, str) else f"{o[0]} ({o[1]})"
+    )
+    u1, u2 = st.columns(2)
+    until_mode = u1.radio("Stop at", ["Any target", "Full set"], horizontal=True)
+    until_players = u2.selectbox("Simulated players", [1_000, 10_000, 100_000], index=1)
+
+    if st.button("Run", disabled=not until_targets):
+        from stablesim.campaign import run_campaign
+        st.session_state.UNTIL = run_campaign(
+            banner_choice,
+            until_targets,
+            until_players,
+            seed=sim.state.stream.seed,
+            workers=1,
+            max_pulls=20_000,
+            # a random session seed never recurs; only cache chosen ones
+            cache=sim.cache if sim.state.stream.seeded else None,
+            collect=until_mode == "Full set"
+        )
+
+    until = st.session_state.get("UNTIL")
+    if until is not None and until.banner == banner_choice:
+        m1, m2, m3, m4, m5 = st.columns(5)
+        mean = until.mean()
+        m1.metric("Mean", f"{mean:.1f}" if mean is not None else "—")
+        m2.metric("Median", until.percentile(50) or "—")
+        m3.metric("90%", until.percentile(90) or "—")
+        m4.metric("99%", until.percentile(99) or "—")
+        m5.metric("Worst", until.worst() or "—")
+        if until.missed:
+            st.caption(f"{until.missed:,} of {until.players:,} players didn't finish within 20,000 pulls")
+        st.line_chart({"Share of players done within n pulls": until.cdf()})
+
+# ---------------- EXACT ODDS ----------------
+
+# the chain is solved, and numpy loaded, only once the panel is opened
+if st.toggle("🎯 Exact Odds"):
+    from stablesim.odds import pulls_quantile
+
+    with st.container(border=True):
+        sampler = sim.registry.samplers[banner_choice]
+        pity = sim.registry.pity[banner_choice]
+        chain = sim.registry.exact_odds(banner_choice)
+
+        rows = [[r, f"{p * 100:.3f}%"] for r, p in chain.rarity_rates().items()]
+        for a, rate in enumerate(chain.pity_rates()):
+            rows.append([pity.labels[chain.active[a]], f"{rate * 100:.3f}%"])
+        render_table(rows, ["Outcome", "Long-run Rate"])
+
+        options = list(sampler.index)
+        default = 0
+        if sampler.featured:
+            first = sampler.featured[0]
+            default = options.index((sampler.names[first], sampler.rarities[first]))
+
+        target = st.selectbox(
+            "Target item",
+            options,
+            index=default,
+            format_func=lambda o: f"{o[0]} ({o[1]})"
+        )
+        from_current = st.checkbox(
+            "Start from current pity",
+            value=sim.state.persist_pity
+        )
+
+        targets, _ = sampler.index[target]
+        st.caption(
+            f"Listed chance {sampler.chances[targets[0]]:.2f}% · "
+            f"long-run with pity {sim.registry.effective_chances(banner_choice)[targets[0]]:.3f}%"
+        )
+        counters = sim.counters(banner_choice) if from_current else None
+        cdf = chain.pulls_cdf(targets, counters)
+
+        o1, o2, o3, o4 = st.columns(4)
+        o1.metric("Expected pulls", f"{chain.expected_pulls(targets, counters):.1f}")
+        o2.metric("Median", pulls_quantile(cdf, 0.5) or "—")
+        o3.metric("90%", pulls_quantile(cdf, 0.9) or "—")
+        o4.metric("99%", pulls_quantile(cdf, 0.99) or "—")
+
+        if len(cdf):
+            st.line_chart({"P(obtained within n pulls)": cdf})
 
 # ---------------- FOOTER ----------------
 
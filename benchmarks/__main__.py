@@ -0,0 +1,51 @@
+import argparse
+import sys
+
+from benchmarks import bench_engine, bench_render, bench_startup  # noqa: F401  (registers benchmarks)
+from benchmarks.harness import RESULTS_DIR, compare, run_benchmarks, save_results
+from stablesim.conformance import format_result, run_conformance
+
+# =========================
+# CLI
+# =========================
+#   python -m benchmarks                         run everything, save JSON
+#   python -m benchmarks multi_pull render       only matching benchmarks
+#   python -m benchmarks startup                 cold-start import and first-render times
+#   python -m benchmarks --compare results/old.json
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("select", nargs="*", help="run benchmarks whose key contains any of these")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=RESULTS_DIR, help="directory for the JSON results")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--no-check", action="store_true", help="skip the odds check")
+    args = parser.parse_args(argv)
+
+    print("# benchmarks")
+    results = run_benchmarks(args.select, args.repeat)
+
+    checks = []
+    if not args.no_check:
+        print("\n# odds check (stablesim.conformance)")
+        checks = run_conformance()
+        for check in checks:
+            print(format_result(check))
+
+    path = save_results(results, checks, args.output)
+    print(f"\nsaved {path}")
+
+    regressions = []
+    if args.compare:
+        print(f"\n# compared with {args.compare}")
+        regressions = compare(results, args.compare)
+
+    failed = sorted({c["banner"] for c in checks if c["status"] == "fail"})
+    if failed:
+        print(f"\nodds check failed: {', '.join(failed)}", file=sys.stderr)
+    return 1 if failed or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+import random
+
+from benchmarks.harness import benchmark
+from stablesim.core import Simulator, default_registry
+from stablesim.valuation import rank_banners
+
+REGISTRY = default_registry()
+BANNERS = list(REGISTRY.banners)
+
+
+def weighted_choice(items, rng):
+    # the app's original linear scan, kept as the baseline the alias
+    # tables are measured against
+    total = sum(w for _, _, w in items)
+    r = rng.uniform(0, total)
+
+    upto = 0
+    for name, rarity, weight in items:
+        if upto + weight >= r:
+            return name, rarity
+        upto += weight
+
+    return items[-1][0], items[-1][1]
+
+
+@benchmark("weighted_choice", [{"banner": b} for b in BANNERS])
+def weighted_choice_bench(banner):
+    items = REGISTRY.banners[banner]
+    rng = random.Random(0)
+    return lambda: weighted_choice(items, rng)
+
+
+@benchmark("pull_once", [{"banner": b} for b in BANNERS])
+def pull_once_bench(banner):
+    sim = Simulator(REGISTRY)
+    sim.reseed(0)
+    return lambda: sim.pull_once(banner)
+
+
+@benchmark("multi_pull", [
+    {"banner": b, "pulls": n}
+    for b in ("Flutterwing Stable", "Creatures of the Night")
+    for n in (1, 10, 100, 10_000, 1_000_000)
+])
+def multi_pull_bench(banner, pulls):
+    # a fresh simulator per call so the session history doesn't keep growing
+    return lambda: Simulator(REGISTRY).multi_pull(banner, pulls, ["friesian"], advanced=True)
+
+
+@benchmark("best_banner")
+def best_banner_bench():
+    return lambda: rank_banners(REGISTRY)
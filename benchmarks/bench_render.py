@@ -0,0 +1,40 @@
+import io
+
+from benchmarks.harness import benchmark
+from stablesim.core import Simulator, default_registry
+from stablesim.export import write_export
+from stablesim.render import TableRenderer
+
+HEADERS = ["#", "Item", "Rarity", "Chance", "Owned", "Mark"]
+# the app's dark theme
+COLORS = {
+    "Rare": "#4da6ff",
+    "Epic": "#9b59b6",
+    "Legendary": "#c9a227",
+    "Fantasy": "#ffd966",
+    "Flying": "#ff9fd6",
+    "Featured Fantasy": "#ff6fb1",
+}
+
+
+def session(pulls):
+    sim = Simulator(default_registry())
+    sim.multi_pull("Flutterwing Stable", pulls, ["friesian"], advanced=True)
+    return sim
+
+
+@benchmark("render_table", [{"rows": n} for n in (100, 1_000, 10_000)])
+def render_table_bench(rows):
+    results = list(session(rows).state.last_results)
+    renderer = TableRenderer(COLORS, ["friesian"])
+    return lambda: renderer.table(results, HEADERS)
+
+
+@benchmark("export", [
+    {"fmt": fmt, "rows": n}
+    for fmt in ("csv", "csv.gz")
+    for n in (10_000, 1_000_000)
+])
+def export_bench(fmt, rows):
+    history = session(rows).state.history
+    return lambda: write_export(history, io.BytesIO(), fmt)
@@ -0,0 +1,53 @@
+import importlib.util
+import subprocess
+import sys
+
+from benchmarks.harness import ROOT, benchmark
+
+# =========================
+# COLD START
+# =========================
+# Every call is a fresh interpreter, so nothing is warm but the OS file
+# cache. Steps build on each other; the gap between two is what that
+# step adds. "python" is the floor every other step pays.
+
+STEPS = {
+    "python": "pass",
+    "import_core": "import stablesim.core",
+    "registry": (
+        "from stablesim.core import Simulator, default_registry\n"
+        "Simulator(default_registry())"
+    ),
+    # what the compiled catalog cache saves
+    "registry_parse": (
+        "from stablesim.banners import CATALOG_DIR\n"
+        "from stablesim.core import load_registry\n"
+        "load_registry(CATALOG_DIR, use_cache=False)"
+    ),
+    # the engine loads here, not at startup
+    "first_pull": (
+        "from stablesim.core import Simulator, default_registry\n"
+        "Simulator(default_registry()).multi_pull('Flutterwing Stable', 10)"
+    ),
+}
+
+APP = sorted(ROOT.glob("StableSimulator_v*.py"))[-1]
+
+# the app itself needs Streamlit; its steps are skipped where it isn't installed
+if importlib.util.find_spec("streamlit") is not None:
+    STEPS["import_streamlit"] = "import streamlit"
+    STEPS["first_render"] = (
+        "from streamlit.testing.v1 import AppTest\n"
+        f"app = AppTest.from_file({str(APP)!r}, default_timeout=60).run()\n"
+        "assert not app.exception, app.exception"
+    )
+
+
+def run_python(code):
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+
+
+@benchmark("startup", [{"step": s} for s in STEPS])
+def startup_bench(step):
+    code = STEPS[step]
+    return lambda: run_python(code)
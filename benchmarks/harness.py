@@ -0,0 +1,129 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# =========================
+# REGISTRY
+# =========================
+# A benchmark is a setup function: it takes its params as keywords, does
+# any preparation outside the clock and returns the callable to time.
+
+BENCHMARKS = []
+
+
+def benchmark(name, params=None):
+    def register(setup):
+        for p in params or [{}]:
+            BENCHMARKS.append((name, p, setup))
+        return setup
+    return register
+
+
+def label(name, params):
+    if not params:
+        return name
+    return name + "[" + ",".join(f"{k}={v}" for k, v in params.items()) + "]"
+
+
+# =========================
+# TIMING
+# =========================
+
+def time_call(fn, repeat=5, min_time=0.2):
+    timer = timeit.Timer(fn)
+    number, elapsed = timer.autorange()
+    # slow calls: autorange already ran one; don't spend seconds on more
+    if elapsed >= min_time * 5:
+        repeat = min(repeat, 3)
+    runs = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "number": number,
+        "runs": runs,
+        "min": min(runs),
+        "mean": statistics.fmean(runs),
+        "stdev": statistics.stdev(runs) if len(runs) > 1 else 0.0,
+    }
+
+
+def run_benchmarks(selected=None, repeat=5, log=print):
+    results = []
+    for name, params, setup in BENCHMARKS:
+        key = label(name, params)
+        if selected and not any(s in key for s in selected):
+            continue
+        timing = time_call(setup(**params), repeat)
+        results.append({"name": name, "params": params, "key": key, **timing})
+        log(f"{key:<55} {format_seconds(timing['min']):>10}  ±{format_seconds(timing['stdev'])}")
+    return results
+
+
+def format_seconds(t):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if t >= scale:
+            return f"{t / scale:.2f}{unit}"
+    return f"{t / 1e-9:.0f}ns"
+
+
+# =========================
+# RESULTS
+# =========================
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "app": sorted(p.name for p in ROOT.glob("StableSimulator_v*.py")),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def save_results(results, checks, directory=RESULTS_DIR):
+    env = environment()
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    path = directory / f"{stamp}-{env['commit'] or 'nogit'}.json"
+    with open(path, "w") as f:
+        json.dump({"environment": env, "results": results, "checks": checks}, f, indent=2)
+    return path
+
+
+def compare(results, baseline_path, threshold=1.25, log=print):
+    # ratio of best times; > threshold is a regression
+    with open(baseline_path) as f:
+        baseline = {r["key"]: r for r in json.load(f)["results"]}
+
+    regressions = []
+    for r in results:
+        old = baseline.get(r["key"])
+        if old is None:
+            continue
+        ratio = r["min"] / old["min"]
+        flag = ""
+        if ratio > threshold:
+            flag = "  << slower"
+            regressions.append(r["key"])
+        elif ratio < 1 / threshold:
+            flag = "  faster"
+        log(f"{r['key']:<55} {ratio:6.2f}x{flag}")
+    return regressions
@@ -0,0 +1,5 @@
+import sys
+
+from stablesim.cli import main
+
+sys.exit(main())
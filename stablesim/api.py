@@ -0,0 +1,430 @@
+import asyncio
+import json
+from urllib.parse import parse_qs, urlencode
+
+import numpy as np
+
+from stablesim.batch import batch_pull_many
+from stablesim.core import Simulator, SimulatorState, default_registry
+from stablesim.rng import PullStream
+
+# =========================
+# HTTP API
+# =========================
+# A plain ASGI app in front of the headless engine, for bots and
+# dashboards. No framework: routes are a dict, bodies and replies JSON.
+#
+#   GET  /banners                              names, aliases, cost
+#   GET  /odds?banner=&target=&counters=       exact odds, as `stablesim odds`
+#   GET  /health                               request and batch counts
+#   POST /pull        {banner, seed?, counters?}
+#   POST /multi_pull  {banner, pulls, seed?, counters?, summary?}
+#   POST /until       {banner, targets, players?, all?, seed?, max_pulls?}
+#
+# Banners resolve through the registry's aliases, so "flutterwing" works
+# wherever "Flutterwing Stable" does. Counters are starting pity, either
+# {label: n} or a list in rule order; fresh pity if left out.
+#
+# Seeded pulls replay: same seed and counters, same pulls as
+# `stablesim pull --seed`, served through the result cache. Unseeded
+# pulls come from the server's own stream, and concurrent ones on a
+# banner are batched: everything queued before the draw runs shares one
+# block of uniforms and one alias lookup, with pity resolved per request.
+# That gives the same pulls as serving them one after another.
+#
+# Replies are strict JSON: no NaN or Infinity. /until returns its seed as
+# a string, since an unseeded run reports 128 bits of OS entropy.
+#
+# Serve with any ASGI server (`stablesim serve` uses uvicorn); ApiClient
+# drives the app in process, without sockets.
+
+MAX_PULLS = 100_000
+MAX_PLAYERS = 1_000_000
+MAX_UNTIL_PULLS = 20_000
+MAX_BODY = 1024 * 1024
+
+
+class ApiError(ValueError):
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+# =========================
+# REQUEST BATCHING
+# =========================
+
+class PullBatcher:
+    __slots__ = ("registry", "stream", "window", "pending", "batches", "requests")
+
+    def __init__(self, registry, seed=None, window=0.0):
+        self.registry = registry
+        self.stream = PullStream(seed)
+        # seconds to hold a batch open; 0 = until the loop's next turn
+        self.window = window
+        # banner -> [(amount, counters, future)] waiting for the next draw
+        self.pending = {}
+        self.batches = 0
+        self.requests = 0
+
+    async def draw(self, banner, amount, counters=None):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        queue = self.pending.setdefault(banner, [])
+        queue.append((amount, counters, future))
+        if len(queue) == 1:
+            if self.window:
+                loop.call_later(self.window, self.flush, banner)
+            else:
+                loop.call_soon(self.flush, banner)
+        return await future
+
+    def flush(self, banner):
+        queue = self.pending.pop(banner)
+        amounts = [amount for amount, _, _ in queue]
+        try:
+            results = batch_pull_many(
+                self.registry.samplers[banner], self.registry.pity[banner],
+                amounts, [counters for _, counters, _ in queue],
+                rng=self.stream.take(sum(amounts)),
+            )
+        except Exception as e:
+            for _, _, future in queue:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.requests += len(queue)
+        for (_, _, future), (picks, _, pity_used, counters) in zip(queue, results):
+            # a client that went away leaves a cancelled future
+            if not future.done():
+                future.set_result((picks, pity_used, counters))
+
+
+# =========================
+# PARAMETERS
+# =========================
+
+REQUIRED = object()
+
+
+def whole(key, value, low=None, high=None):
+    # JSON numbers, or digits from a query string
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ApiError(f"'{key}' must be a whole number")
+    if low is not None and value < low:
+        raise ApiError(f"'{key}' must be at least {low}")
+    if high is not None and value > high:
+        raise ApiError(f"'{key}' is over the limit of {high:,}", 413)
+    return value
+
+
+def field(args, key, kind, default=REQUIRED, low=None, high=None):
+    value = args.get(key, default)
+    if value is REQUIRED:
+        raise ApiError(f"missing '{key}'")
+    if value is None or value is default:
+        return value
+    if kind is int:
+        return whole(key, value, low, high)
+    if not isinstance(value, kind):
+        raise ApiError(f"'{key}' must be a {kind.__name__}")
+    return value
+
+
+def first(query, key, default=None):
+    values = query.get(key)
+    return values[0] if values else default
+
+
+# =========================
+# APP
+# =========================
+
+class SimulationAPI:
+    __slots__ = ("registry", "cache", "batcher", "routes")
+
+    def __init__(self, cache=None, seed=None, window=0.0):
+        # campaigns read the default registry, so everything here does too
+        self.registry = default_registry()
+        self.cache = cache
+        self.batcher = PullBatcher(self.registry, seed, window)
+        self.routes = {
+            ("GET", "/banners"): self.banners,
+            ("GET", "/health"): self.health,
+            ("GET", "/odds"): self.odds,
+            ("POST", "/pull"): self.pull,
+            ("POST", "/multi_pull"): self.multi_pull,
+            ("POST", "/until"): self.until,
+        }
+
+    # ---------- ASGI ----------
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self.lifespan(receive, send)
+        if scope["type"] != "http":
+            return
+
+        status, payload = await self.dispatch(scope, receive)
+        body = json.dumps(payload, default=float, allow_nan=False).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("ascii")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def dispatch(self, scope, receive):
+        method, path = scope["method"], scope["path"].rstrip("/") or "/"
+        handler = self.routes.get((method, path))
+        if handler is None:
+            if any(p == path for _, p in self.routes):
+                return 405, {"error": f"{method} not allowed on {path}"}
+            return 404, {"error": f"no route {path}"}
+
+        try:
+            if method == "GET":
+                args = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+            else:
+                args = json.loads(await read_body(receive) or b"{}")
+                if not isinstance(args, dict):
+                    raise ApiError("body must be a JSON object")
+            return 200, await handler(args)
+        except ValueError as e:
+            # bad JSON, bad fields, unknown targets from the engine
+            return getattr(e, "status", 400), {"error": str(e)}
+
+    # ---------- HELPERS ----------
+
+    def banner(self, value):
+        if not isinstance(value, str):
+            raise ApiError("missing 'banner'")
+        name = self.registry.resolve_banner(value)
+        if name is None:
+            raise ApiError(f"unknown banner: {value}", 404)
+        return name
+
+    def counters(self, banner, value):
+        labels = self.registry.pity[banner].labels
+        if value is None:
+            return None
+        if isinstance(value, str):
+            value = value.split(",")
+        if isinstance(value, dict):
+            unknown = set(value) - set(labels)
+            if unknown:
+                raise ApiError(f"{banner} has no pity counter {sorted(unknown)[0]!r}")
+            value = [value.get(label, 0) for label in labels]
+        if not isinstance(value, list) or len(value) != len(labels):
+            raise ApiError(f"{banner} needs {len(labels)} pity counters: {', '.join(labels)}")
+        return [whole("counters", c, low=0) for c in value]
+
+    async def draw(self, banner, amount, seed, counters):
+        # (picks, pity flags, counters after)
+        if seed is None:
+            return await self.batcher.draw(banner, amount, counters)
+        state = list(counters) if counters is not None else [0] * len(self.registry.pity[banner])
+        sim = Simulator(self.registry, SimulatorState(seed=seed), cache=self.cache)
+        picks, pity_used, _ = sim.draw_batch(banner, amount, state)
+        return picks, pity_used, state
+
+    # ---------- ROUTES ----------
+
+    async def banners(self, query):
+        return [
+            {
+                "name": name,
+                "aliases": [a for a, n in self.registry.aliases.items() if n == name],
+                "archived": name in self.registry.archived,
+                "cost": self.registry.costs[name],
+            }
+            for name in self.registry.banners
+        ]
+
+    async def health(self, query):
+        return {
+            "status": "ok",
+            "banners": len(self.registry.banners),
+            "requests": self.batcher.requests,
+            "batches": self.batcher.batches,
+        }
+
+    async def odds(self, query):
+        from stablesim.odds import odds_report
+        banner = self.banner(first(query, "banner"))
+        counters = self.counters(banner, first(query, "counters"))
+        # the pity chain is solved off the event loop the first time
+        return await asyncio.to_thread(
+            odds_report, self.registry, banner, query.get("target"), counters,
+        )
+
+    async def pull(self, body):
+        banner = self.banner(body.get("banner"))
+        seed = field(body, "seed", int, None, low=0)
+        counters = self.counters(banner, body.get("counters"))
+        picks, pity_used, state = await self.draw(banner, 1, seed, counters)
+
+        sampler = self.registry.samplers[banner]
+        i = int(picks[0])
+        return {
+            "banner": banner,
+            "seed": seed,
+            "item": sampler.names[i],
+            "rarity": sampler.rarities[i],
+            "pity": bool(pity_used[0]),
+            "counters": dict(zip(self.registry.pity[banner].labels, state)),
+        }
+
+    async def multi_pull(self, body):
+        banner = self.banner(body.get("banner"))
+        amount = field(body, "pulls", int, low=1, high=MAX_PULLS)
+        seed = field(body, "seed", int, None, low=0)
+        counters = self.counters(banner, body.get("counters"))
+        summary = field(body, "summary", bool, False)
+        picks, pity_used, state = await self.draw(banner, amount, seed, counters)
+
+        sampler = self.registry.samplers[banner]
+        rarities = {}
+        for i, n in enumerate(np.bincount(picks, minlength=len(sampler.items)).tolist()):
+            if n:
+                rarities[sampler.rarities[i]] = rarities.get(sampler.rarities[i], 0) + n
+
+        reply = {
+            "banner": banner,
+            "pulls": amount,
+            "seed": seed,
+            "counters": dict(zip(self.registry.pity[banner].labels, state)),
+            "rarities": rarities,
+        }
+        if not summary:
+            reply["results"] = [
+                [sampler.names[i], sampler.rarities[i], forced]
+                for i, forced in zip(picks.tolist(), pity_used.tolist())
+            ]
+        return reply
+
+    async def until(self, body):
+        from stablesim.campaign import run_campaign
+        banner = self.banner(body.get("banner"))
+        targets = field(body, "targets", list)
+        if not targets:
+            raise ApiError("'targets' must not be empty")
+        for target in targets:
+            # an item name or rarity, or a [name, rarity] pair
+            pair = isinstance(target, list) and len(target) == 2
+            if not (isinstance(target, str) or pair and all(isinstance(t, str) for t in target)):
+                raise ApiError(f"bad target {json.dumps(target)}: expected a name, a rarity or [name, rarity]")
+        result = await asyncio.to_thread(
+            run_campaign, banner, targets,
+            field(body, "players", int, 10_000, low=1, high=MAX_PLAYERS),
+            seed=field(body, "seed", int, None, low=0),
+            workers=1,
+            max_pulls=field(body, "max_pulls", int, 10_000, low=1, high=MAX_UNTIL_PULLS),
+            cache=self.cache,
+            collect=field(body, "all", bool, False),
+        )
+        summary = result.summary()
+        summary["seed"] = str(summary["seed"])
+        return summary
+
+
+async def read_body(receive):
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > MAX_BODY:
+            raise ApiError("request body too large", 413)
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            break
+    return b"".join(chunks)
+
+
+# =========================
+# IN-PROCESS CLIENT
+# =========================
+# Calls the app directly with ASGI messages: no server, no sockets.
+# Requests gathered on one loop are concurrent, so they batch.
+
+class ApiResponse:
+    __slots__ = ("status", "headers", "body")
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class ApiClient:
+    __slots__ = ("app",)
+
+    def __init__(self, app):
+        self.app = app
+
+    async def request(self, method, path, body=None, params=None):
+        data = json.dumps(body).encode("utf-8") if body is not None else b""
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode("utf-8"),
+            "query_string": urlencode(params or {}, doseq=True).encode("ascii"),
+            "root_path": "",
+            "headers": [(b"content-type", b"application/json")],
+            "client": None,
+            "server": None,
+        }
+        received = False
+
+        async def receive():
+            nonlocal received
+            if received:
+                return {"type": "http.disconnect"}
+            received = True
+            return {"type": "http.request", "body": data, "more_body": False}
+
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        await self.app(scope, receive, send)
+        start = sent[0]
+        return ApiResponse(
+            start["status"],
+            {k.decode("latin-1"): v.decode("latin-1") for k, v in start["headers"]},
+            b"".join(m.get("body", b"") for m in sent[1:]),
+        )
+
+    async def get(self, path, **params):
+        return await self.request("GET", path, params=params)
+
+    async def post(self, path, body=None):
+        return await self.request("POST", path, body)
@@ -0,0 +1,13 @@
+from pathlib import Path
+
+# =========================
+# BANNERS
+# =========================
+# Banner catalogs live in stablesim/catalogs, one TOML/JSON file each;
+# see stablesim.catalog for the format.
+
+CATALOG_DIR = Path(__file__).parent / "catalogs"
+
+
+def normalize(text):
+    return text.lower().replace(" ", "").replace("_", "")
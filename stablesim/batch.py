@@ -0,0 +1,202 @@
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+# =========================
+# VECTOR ALIAS DRAWS
+# =========================
+
+def table_arrays(table):
+    # numpy mirror of an AliasTable, built once and kept on the table;
+    # tables restored from the compiled cache hold mmap views, which are
+    # wrapped without a copy
+    arrays = table._arrays
+    if arrays is None or not isinstance(arrays[0], np.ndarray):
+        prob, keep, alias = arrays or (table.prob, table.keep, table.alias)
+        arrays = (
+            np.asarray(prob, dtype=np.float64),
+            np.asarray(keep, dtype=np.intp),
+            np.asarray(alias, dtype=np.intp),
+        )
+        table._arrays = arrays
+    return arrays
+
+
+def pity_arrays(pity):
+    # item x counter reset matrix, built once and kept on the rules
+    arrays = pity._arrays
+    if arrays is None:
+        arrays = np.array(pity.reset_on, dtype=bool).reshape(len(pity), len(pity.reset_by)).T
+        pity._arrays = arrays
+    return arrays
+
+
+def pick_many(table, u):
+    prob, keep, alias = table_arrays(table)
+    x = u * table.size
+    i = x.astype(np.intp)
+    np.minimum(i, table.size - 1, out=i)
+    return np.where(x - i < prob[i], keep[i], alias[i])
+
+
+# =========================
+# BATCH PULL
+# =========================
+# Every pull consumes exactly one uniform: organic pulls feed it to the
+# full table, forced pulls to the pity pool. All organic draws are made
+# up front; the pity machine only has to visit the pulls where a counter
+# actually fires, everything in between is a vectorised segment.
+
+def batch_pull(banner, pity, amount, counters=None, rng=None):
+    rng = rng if rng is not None else np.random.default_rng()
+    u = rng.random(amount)
+    return resolve_pity(banner, pity, u, pick_many(banner.table, u), counters)
+
+
+def resolve_pity(banner, pity, u, picks, counters=None):
+    # `picks` are the organic draws for uniforms `u`; pity pulls are
+    # overwritten in place
+    amount = len(u)
+    counters = list(counters) if counters is not None else [0] * len(pity)
+    pity_used = np.zeros(amount, dtype=bool)
+
+    resets, firsts = [], []
+    reset_on = pity_arrays(pity)
+    for k in range(len(pity)):
+        pos = np.flatnonzero(reset_on[picks, k])
+        # first pull a counter would fire inside each gap between resets
+        ends = np.append(pos[1:], amount)
+        gap = pos + pity.thresholds[k]
+        resets.append(pos.tolist())
+        firsts.append(gap[gap <= ends].tolist())
+
+    forced = [[] for _ in range(len(pity))]
+    p = 0
+
+    while p < amount:
+        q, fired = amount, -1
+
+        for k in range(len(pity)):
+            if pity.pools[k] is None:
+                continue
+            r_list = resets[k]
+            j = bisect_left(r_list, p)
+            r = r_list[j] if j < len(r_list) else amount
+            cand = max(p - 1 - counters[k] + pity.thresholds[k], p)
+            if cand > r:
+                g = firsts[k]
+                j = bisect_right(g, r)
+                cand = g[j] if j < len(g) else amount
+            if cand < q:
+                q, fired = cand, k
+
+        if fired < 0:
+            break
+
+        for k in range(len(pity)):
+            if k in pity.resets[fired]:
+                counters[k] = 0
+            else:
+                counters[k] = q - last_event(resets[k], p, q, counters[k])
+
+        forced[fired].append(q)
+        p = q + 1
+
+    for k in range(len(pity)):
+        counters[k] = amount - 1 - last_event(resets[k], p, amount, counters[k])
+
+    for k, positions in enumerate(forced):
+        if positions:
+            positions = np.asarray(positions, dtype=np.intp)
+            picks[positions] = pick_many(pity.pools[k], u[positions])
+            pity_used[positions] = True
+
+    rarities = np.asarray(banner.rarity_codes, dtype=np.uint8)[picks]
+    return picks, rarities, pity_used, counters
+
+
+def batch_pull_many(banner, pity, amounts, counters, rng=None):
+    # independent requests on one banner, each with its own pity counters,
+    # served from a single draw: one block of uniforms and one alias
+    # lookup, then pity is resolved per request on its slice
+    rng = rng if rng is not None else np.random.default_rng()
+    u = rng.random(sum(amounts))
+    picks = pick_many(banner.table, u)
+
+    results, start = [], 0
+    for amount, state in zip(amounts, counters):
+        stop = start + amount
+        results.append(resolve_pity(banner, pity, u[start:stop], picks[start:stop], state))
+        start = stop
+    return results
+
+
+def last_event(reset_list, start, stop, counter):
+    # index of the last organic reset in [start, stop), else the pull
+    # where the counter was last zeroed before `start`
+    j = bisect_left(reset_list, stop) - 1
+    if j >= 0 and reset_list[j] >= start:
+        return reset_list[j]
+    return start - 1 - counter
+
+
+# =========================
+# PLAYERS IN LOCKSTEP
+# =========================
+# Many independent players, each from fresh (or given) pity, pulling until
+# they get any of `targets`. Every step advances all players still
+# pulling by one pull; finished players drop out of the arrays.
+#
+# With collect=True, `targets` is a list of item groups instead and a
+# player stops once they hold something from every group (a full set).
+
+def pulls_until(banner, pity, players, targets, rng=None, counters=None, max_pulls=10_000,
+                collect=False):
+    rng = rng if rng is not None else np.random.default_rng()
+    reset_on = pity_arrays(pity)
+
+    groups = [list(g) for g in targets] if collect else [list(targets)]
+    group_of = np.full(len(banner.items), -1, dtype=np.intp)
+    for g, ids in enumerate(groups):
+        group_of[ids] = g
+    have = np.zeros((players, len(groups)), dtype=bool)
+
+    state = np.zeros((players, len(pity)), dtype=np.int64)
+    if counters is not None:
+        state[:] = counters
+    active = np.arange(players)
+    # pulls needed per player; 0 = not reached within max_pulls
+    needed = np.zeros(players, dtype=np.int64)
+
+    for pull in range(1, max_pulls + 1):
+        if not len(active):
+            break
+
+        u = rng.random(len(active))
+        state += 1
+        picks = pick_many(banner.table, u)
+        organic = np.ones(len(active), dtype=bool)
+
+        for k in pity.order:
+            fire = organic & (state[:, k] >= pity.thresholds[k])
+            if fire.any():
+                picks[fire] = pick_many(pity.pools[k], u[fire])
+                rows = np.flatnonzero(fire)
+                state[np.ix_(rows, pity.resets[k])] = 0
+                organic &= ~fire
+
+        state[organic] *= ~reset_on[picks[organic]]
+
+        got = group_of[picks]
+        if len(groups) == 1:
+            done = got >= 0
+        else:
+            hit = np.flatnonzero(got >= 0)
+            have[hit, got[hit]] = True
+            done = have.all(axis=1)
+        needed[active[done]] = pull
+        active = active[~done]
+        state = state[~done]
+        have = have[~done]
+
+    return needed
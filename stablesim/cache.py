@@ -0,0 +1,147 @@
+import hashlib
+import pickle
+import threading
+from collections import OrderedDict
+
+# =========================
+# RESULT CACHE
+# =========================
+# Simulations are pure functions of (catalog, pulls, seed, stream offset,
+# starting pity), so identical runs can be served from memory instead of
+# re-drawn. Entries are LRU-evicted by count and by size. With a `path`
+# they are also written to sqlite, which survives restarts and can be
+# shared by every worker process on the host. The table is bounded too:
+# after each write the oldest rows beyond `db_rows` or `db_bytes` go.
+#
+# One cache is shared by all sessions of a deployment, hence the lock.
+# Callers only cache seeded runs; random seeds never come back.
+
+MAX_ENTRIES = 256
+MAX_BYTES = 128 * 1024 * 1024
+MAX_DB_ROWS = 4096
+MAX_DB_BYTES = 1024 * 1024 * 1024
+
+
+def catalog_hash(sampler, pity):
+    # everything the engines read from a compiled banner
+    spec = (
+        sampler.items, sampler.featured,
+        pity.keys, pity.thresholds, pity.resets, pity.reset_on,
+        [sorted(set(table.keep)) if table else None for table in pity.pools],
+    )
+    return hashlib.sha1(repr(spec).encode("utf-8")).hexdigest()[:16]
+
+
+def entry_size(value):
+    # numpy arrays, without importing numpy for the check
+    if hasattr(value, "nbytes"):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(entry_size(v) for v in value.values()) + 64
+    if isinstance(value, (tuple, list)):
+        return sum(entry_size(v) for v in value) + 16
+    return 16
+
+
+class ResultCache:
+    __slots__ = (
+        "entries", "nbytes", "max_entries", "max_bytes", "db_rows", "db_bytes",
+        "hits", "misses", "db", "lock",
+    )
+
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES, path=None,
+                 db_rows=MAX_DB_ROWS, db_bytes=MAX_DB_BYTES):
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.db_rows = db_rows
+        self.db_bytes = db_bytes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.db = None
+        if path:
+            import sqlite3
+            self.db = sqlite3.connect(str(path), check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB)")
+            self.db.commit()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        key = repr(key)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key][0]
+
+            if self.db is not None:
+                row = self.db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    value = pickle.loads(row[0])
+                    self.remember(key, value)
+                    self.hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        key = repr(key)
+        with self.lock:
+            self.remember(key, value)
+            if self.db is not None:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?)",
+                    (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)),
+                )
+                self.trim_db()
+                self.db.commit()
+
+    def trim_db(self):
+        # replaced rows get a new rowid, so rowid order is write order
+        self.db.execute(
+            """
+            DELETE FROM results WHERE rowid IN (
+                SELECT rowid FROM (
+                    SELECT rowid,
+                           ROW_NUMBER() OVER (ORDER BY rowid DESC) AS n,
+                           SUM(length(value)) OVER (ORDER BY rowid DESC) AS total
+                    FROM results
+                ) WHERE n > ? OR total > ?
+            )
+            """,
+            (self.db_rows, self.db_bytes),
+        )
+
+    def remember(self, key, value):
+        size = entry_size(value)
+        if size > self.max_bytes:
+            return
+        if key in self.entries:
+            self.nbytes -= self.entries.pop(key)[1]
+        self.entries[key] = (value, size)
+        self.nbytes += size
+        while len(self.entries) > self.max_entries or self.nbytes > self.max_bytes:
+            _, (_, dropped) = self.entries.popitem(last=False)
+            self.nbytes -= dropped
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.nbytes = 0
+            self.hits = self.misses = 0
+            if self.db is not None:
+                self.db.execute("DELETE FROM results")
+                self.db.commit()
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self.entries),
+            "bytes": self.nbytes,
+        }
@@ -0,0 +1,158 @@
+import math
+
+import numpy as np
+
+from stablesim.batch import pulls_until
+from stablesim.core import default_registry
+from stablesim.rng import stream_at
+
+# =========================
+# CAMPAIGNS
+# =========================
+# Players are split into fixed-size shards. Shard i always gets child i
+# of the master SeedSequence, so the merged histogram depends only on
+# the seed, never on how many workers ran the shards.
+#
+# Shards carry the compiled banner itself, so campaigns run on whatever
+# registry the caller passes (the default one if none), in-process or in
+# worker processes alike.
+
+SHARD_SIZE = 100_000
+
+def compiled(banner, registry=None):
+    registry = registry or default_registry()
+    name = registry.resolve_banner(banner)
+    if name is None:
+        raise ValueError(f"unknown banner: {banner}")
+    return registry.samplers[name], registry.pity[name]
+
+
+def target_groups(sampler, targets):
+    # a target is an item name, a rarity ("Legendary" = every item of it)
+    # or a (name, rarity) pair; each (name, rarity) it covers is one group
+    groups = {}
+    for target in targets:
+        if isinstance(target, str):
+            wanted = target.lower()
+            keys = [
+                key for key in sampler.index
+                if wanted in (key[0].lower(), key[1].lower())
+            ]
+        else:
+            keys = [tuple(target)] if tuple(target) in sampler.index else []
+        if not keys:
+            raise ValueError(f"{sampler.name} has no item or rarity matching: {target}")
+        for key in keys:
+            groups[key] = sampler.index[key][0]
+    return list(groups.values())
+
+
+def target_indices(sampler, targets):
+    return [i for group in target_groups(sampler, targets) for i in group]
+
+
+def run_shard(job):
+    sampler, pity, players, targets, seed, max_pulls, collect = job
+    wanted = target_groups(sampler, targets) if collect else target_indices(sampler, targets)
+    needed = pulls_until(
+        sampler, pity, players, wanted,
+        rng=stream_at(seed), max_pulls=max_pulls, collect=collect,
+    )
+    return np.bincount(needed, minlength=max_pulls + 1)
+
+
+def run_campaign(banner, targets, players, seed=None, workers=None,
+                 max_pulls=10_000, shard_size=SHARD_SIZE, cache=None, collect=False,
+                 registry=None):
+    # collect=False: until any target; collect=True: until one of each
+    registry = registry or default_registry()
+    sampler, pity = compiled(banner, registry)
+    if not targets:
+        raise ValueError("no targets to pull for")
+    target_groups(sampler, targets)
+
+    # unseeded runs never repeat, so only seeded ones are worth caching
+    key = None
+    if cache is not None and seed is not None:
+        key = (
+            "campaign", registry.hashes[sampler.name], tuple(targets),
+            collect, players, seed, max_pulls, shard_size,
+        )
+        histogram = cache.get(key)
+        if histogram is not None:
+            return CampaignResult(sampler.name, list(targets), players, seed, histogram, collect)
+
+    master = np.random.SeedSequence(seed)
+    shards = math.ceil(players / shard_size)
+    jobs = [
+        (sampler, pity, min(shard_size, players - s * shard_size), list(targets), child, max_pulls, collect)
+        for s, child in enumerate(master.spawn(shards))
+    ]
+
+    histogram = np.zeros(max_pulls + 1, dtype=np.int64)
+    if workers == 1 or shards == 1:
+        for job in jobs:
+            histogram += run_shard(job)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for part in pool.map(run_shard, jobs):
+                histogram += part
+
+    if key is not None:
+        cache.put(key, histogram)
+    return CampaignResult(sampler.name, list(targets), players, master.entropy, histogram, collect)
+
+
+class CampaignResult:
+    __slots__ = ("banner", "targets", "players", "seed", "histogram", "collect")
+
+    def __init__(self, banner, targets, players, seed, histogram, collect=False):
+        self.banner = banner
+        self.targets = targets
+        self.players = players
+        self.seed = seed
+        self.collect = collect
+        # histogram[n] = players who needed exactly n pulls; [0] = never got it
+        self.histogram = histogram
+
+    @property
+    def missed(self):
+        return int(self.histogram[0])
+
+    def mean(self):
+        got = self.histogram[1:]
+        # None, not NaN, when nobody finished: summaries go out as JSON
+        if not got.sum():
+            return None
+        return float((np.arange(1, len(self.histogram)) * got).sum() / got.sum())
+
+    def percentile(self, q):
+        got = np.cumsum(self.histogram[1:])
+        if not len(got) or not got[-1]:
+            return None
+        return int(np.searchsorted(got, q / 100 * got[-1])) + 1
+
+    def worst(self):
+        hit = np.flatnonzero(self.histogram[1:])
+        return int(hit[-1]) + 1 if len(hit) else None
+
+    def cdf(self):
+        # share of all players done within n pulls, n = 1..worst
+        done = np.cumsum(self.histogram[1:(self.worst() or 0) + 1])
+        return done / self.players
+
+    def summary(self):
+        return {
+            "banner": self.banner,
+            "targets": self.targets,
+            "collect": self.collect,
+            "players": self.players,
+            "seed": self.seed,
+            "mean": self.mean(),
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "worst": self.worst(),
+            "missed": self.missed,
+        }
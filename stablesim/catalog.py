@@ -0,0 +1,312 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from pathlib import Path
+
+from stablesim.sampler import AliasTable, CompiledBanner, pool_matches
+
+# =========================
+# CATALOG FILES
+# =========================
+# One banner per TOML or JSON file:
+#
+#   name = "Tack Banner"
+#   aliases = ["tack", "gear"]
+#   archived = false                       # optional
+#   featured = { names = ["..."] }         # optional
+#   cost = 100                             # optional, currency per pull
+#   items = [["Bridle", "Legendary", 0.03], ...]
+#   [[pity]] ...                           # see stablesim.pity
+#
+# Files load in name order, so a numeric prefix sets the banner order.
+
+RARITIES = ("Rare", "Epic", "Legendary", "Fantasy", "Flying", "Featured Fantasy")
+
+# catalog weights are percentages rounded for display
+WEIGHT_TOLERANCE = 2.5
+
+SUFFIXES = (".toml", ".json")
+
+
+class CatalogError(ValueError):
+    pass
+
+
+def catalog_paths(directory):
+    return sorted(p for p in Path(directory).iterdir() if p.suffix in SUFFIXES)
+
+
+def read_catalog(path):
+    path = Path(path)
+    with open(path, "rb") as f:
+        if path.suffix == ".toml":
+            import tomllib
+            return tomllib.load(f)
+        return json.load(f)
+
+
+# =========================
+# VALIDATION
+# =========================
+
+def validate_catalog(data, source="catalog"):
+    # raises CatalogError for anything the engine can't run; returns
+    # warnings for catalogs that run but look wrong
+    def fail(msg):
+        raise CatalogError(f"{source}: {msg}")
+
+    def check_matcher(spec, where):
+        if not isinstance(spec, dict) or not spec or set(spec) - {"rarities", "names"}:
+            fail(f"{where} must be a table of 'rarities' and/or 'names'")
+        for key, values in spec.items():
+            if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+                fail(f"{where}.{key} must be a list of strings")
+
+    warnings = []
+
+    name = data.get("name")
+    if not isinstance(name, str) or not name.strip():
+        fail("'name' must be a non-empty string")
+
+    aliases = data.get("aliases", [])
+    if not isinstance(aliases, list) or not all(isinstance(a, str) for a in aliases):
+        fail("'aliases' must be a list of strings")
+
+    items = data.get("items")
+    if not isinstance(items, list) or not items:
+        fail("'items' must be a non-empty list")
+
+    for n, item in enumerate(items, 1):
+        if not (isinstance(item, (list, tuple)) and len(item) == 3):
+            fail(f"item {n} must be [name, rarity, weight]")
+        item_name, rarity, weight = item
+        if not isinstance(item_name, str) or not item_name:
+            fail(f"item {n} has no name")
+        if rarity not in RARITIES:
+            fail(f"item {n} ({item_name}) has unknown rarity {rarity!r}")
+        if isinstance(weight, bool) or not isinstance(weight, (int, float)) or weight <= 0:
+            fail(f"item {n} ({item_name}) needs a positive weight")
+
+    total = sum(w for _, _, w in items)
+    if abs(total - 100) > WEIGHT_TOLERANCE:
+        warnings.append(f"{name}: weights sum to {total:.2f}%, not 100%")
+
+    if "featured" in data:
+        check_matcher(data["featured"], "featured")
+
+    cost = data.get("cost", 1)
+    if isinstance(cost, bool) or not isinstance(cost, (int, float)) or cost <= 0:
+        fail("'cost' must be a positive number")
+
+    pity = data.get("pity", [])
+    if not isinstance(pity, list):
+        fail("'pity' must be a list of rules")
+    counters = [r.get("counter") for r in pity if isinstance(r, dict)]
+
+    for n, rule in enumerate(pity, 1):
+        where = f"pity rule {n}"
+        if not isinstance(rule, dict):
+            fail(f"{where} must be a table")
+        for key in ("counter", "threshold", "pool", "reset_on", "resets"):
+            if key not in rule:
+                fail(f"{where} is missing '{key}'")
+        if not isinstance(rule["counter"], str) or counters.count(rule["counter"]) > 1:
+            fail(f"{where} needs a unique 'counter' name")
+        threshold = rule["threshold"]
+        if isinstance(threshold, bool) or not isinstance(threshold, int) or threshold < 1:
+            fail(f"{where} threshold must be a positive integer")
+        check_matcher(rule["pool"], f"{where}.pool")
+        check_matcher(rule["reset_on"], f"{where}.reset_on")
+        if not isinstance(rule["resets"], list) or any(c not in counters for c in rule["resets"]):
+            fail(f"{where} resets an unknown counter")
+
+        if not any(pool_matches(rule["pool"], i[0], i[1]) for i in items):
+            warnings.append(f"{name}: {rule['counter']} pity pool matches no items and never fires")
+
+    return warnings
+
+
+# =========================
+# COMPILED CACHE
+# =========================
+# <magic><u64 header size><JSON header><arrays, 8-byte aligned>
+# The header records the source file's size and mtime; a cache whose
+# source has changed is rebuilt. Arrays are read straight out of the
+# mmap, so loading a banner does not parse the catalog at all.
+#
+# Arrays are little-endian and labelled with numpy dtype strings, but
+# are read and written with the stdlib array module: building the
+# registry does not import numpy. The batch engine wraps the alias
+# columns without a copy once it first runs.
+
+MAGIC = b"STSIMC01"
+
+# array typecode <-> dtype string in the header
+DTYPES = {"B": "|u1", "I": "<u4", "q": "<i8", "d": "<f8"}
+TYPECODES = {dtype: code for code, dtype in DTYPES.items()}
+
+
+def source_stamp(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def cache_path(path):
+    path = Path(path)
+    return path.parent / "__pycache__" / (path.name + ".stsim")
+
+
+def write_compiled(path, data, sampler, warnings):
+    names = list(dict.fromkeys(sampler.names))
+    encoded = [n.encode("utf-8") for n in names]
+    offsets = [0]
+    for e in encoded:
+        offsets.append(offsets[-1] + len(e))
+    name_ids = {n: i for i, n in enumerate(names)}
+
+    arrays = {
+        "names_blob": array("B", b"".join(encoded)),
+        "names_offsets": array("I", offsets),
+        "name_ids": array("I", [name_ids[n] for n in sampler.names]),
+        "rarity_codes": array("B", sampler.rarity_codes),
+        "weights": array("d", sampler.weights),
+    }
+    tables = {"": sampler.table}
+    tables.update((k, t) for k, t in sampler.pools.items() if t is not None)
+    for key, table in tables.items():
+        arrays[f"table.{key}.prob"] = array("d", table.prob)
+        arrays[f"table.{key}.keep"] = array("q", table.keep)
+        arrays[f"table.{key}.alias"] = array("q", table.alias)
+
+    layout, offset = {}, 0
+    for key, arr in arrays.items():
+        nbytes = len(arr) * arr.itemsize
+        layout[key] = [DTYPES[arr.typecode], offset, len(arr)]
+        offset += -(-nbytes // 8) * 8
+
+    header = {
+        "source": source_stamp(path),
+        "name": data["name"],
+        "aliases": data.get("aliases", []),
+        "archived": data.get("archived", False),
+        "featured": data.get("featured"),
+        "cost": data.get("cost"),
+        "pity": data.get("pity", []),
+        "rarity_names": list(sampler.rarity_names),
+        "pools": list(sampler.pools),
+        "warnings": warnings,
+        "arrays": layout,
+    }
+    blob = json.dumps(header).encode("utf-8")
+    blob += b" " * (-(len(MAGIC) + 8 + len(blob)) % 8)
+
+    target = cache_path(path)
+    target.parent.mkdir(exist_ok=True)
+    # a private temp file per writer: processes building a cold cache at
+    # once each publish a whole file, and the last replace wins
+    fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=target.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC + struct.pack("<Q", len(blob)) + blob)
+            for arr in arrays.values():
+                raw = arr.tobytes()
+                f.write(raw + b"\0" * (-len(raw) % 8))
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, target)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def read_compiled(path):
+    # None (rebuild) for a missing, stale or unreadable cache
+    target = cache_path(path)
+    try:
+        with open(target, "rb") as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        return decode_compiled(buf, path)
+    except (ValueError, TypeError, KeyError, IndexError, struct.error):
+        # torn or foreign file; JSON and UTF-8 errors are ValueErrors
+        return None
+
+
+def decode_compiled(buf, path):
+    if buf[:len(MAGIC)] != MAGIC:
+        return None
+    (size,) = struct.unpack_from("<Q", buf, len(MAGIC))
+    base = len(MAGIC) + 8 + size
+    header = json.loads(buf[len(MAGIC) + 8:base])
+    if header["source"] != source_stamp(path):
+        return None
+
+    if any(dtype not in TYPECODES for dtype, _, _ in header["arrays"].values()):
+        return None
+    view = memoryview(buf)
+
+    def column(key):
+        # zero-copy typed view into the mmap
+        dtype, offset, count = header["arrays"][key]
+        code = TYPECODES[dtype]
+        start = base + offset
+        stop = start + count * array(code).itemsize
+        if stop > len(view):
+            raise ValueError(f"truncated cache: {key}")
+        return view[start:stop].cast(code)
+
+    blob = column("names_blob").tobytes()
+    offsets = column("names_offsets").tolist()
+    names = [blob[a:b].decode("utf-8") for a, b in zip(offsets, offsets[1:])]
+    rarity_names = header["rarity_names"]
+    items = [
+        (names[n], rarity_names[r], w)
+        for n, r, w in zip(column("name_ids").tolist(), column("rarity_codes").tolist(), column("weights").tolist())
+    ]
+
+    def table(key):
+        return AliasTable.restore(
+            column(f"table.{key}.prob"), column(f"table.{key}.keep"), column(f"table.{key}.alias")
+        )
+
+    pools = {k: (table(k) if f"table.{k}.prob" in header["arrays"] else None) for k in header["pools"]}
+    sampler = CompiledBanner.restore(header["name"], items, table(""), pools, header["featured"])
+    return header, sampler
+
+
+def load_catalog(path, use_cache=True):
+    # returns (banner spec for register_banner, compiled sampler, warnings)
+    # the compiled layout is little-endian only
+    use_cache = use_cache and sys.byteorder == "little"
+    cached = read_compiled(path) if use_cache else None
+
+    if cached is not None:
+        header, sampler = cached
+        data, warnings = header, header["warnings"]
+    else:
+        data = read_catalog(path)
+        warnings = validate_catalog(data, Path(path).name)
+        pools = {rule["counter"]: rule["pool"] for rule in data.get("pity", [])}
+        sampler = CompiledBanner(data["name"], [tuple(i) for i in data["items"]], pools, data.get("featured"))
+        if use_cache:
+            try:
+                write_compiled(path, data, sampler, warnings)
+            except OSError:
+                pass
+
+    spec = {
+        "name": data["name"],
+        "items": sampler.items,
+        "aliases": data.get("aliases", []),
+        "archived": data.get("archived", False),
+        "pity": data.get("pity", []),
+        "featured": data.get("featured"),
+        "cost": data.get("cost"),
+    }
+    return spec, sampler, warnings
@@ -0,0 +1,391 @@
+import argparse
+import csv
+import io
+import json
+import sys
+from pathlib import Path
+
+# =========================
+# COMMAND LINE
+# =========================
+#   stablesim pull <banner> <pulls>         simulate pulls; summary or full export
+#   stablesim until <banner> <targets...>   pulls until a target (or a set, --all)
+#   stablesim odds <banner>                 exact long-run rates and target odds
+#   stablesim campaign <jobs.toml|json>     many until-jobs in one process pool
+#   stablesim export <report>               odds/values/completion/conformance tables
+#   stablesim conformance [banners...]      check simulated odds against the catalogs
+#   stablesim serve                         HTTP API (stablesim.api) on uvicorn
+#
+# Nothing here imports Streamlit. Heavy modules are imported by the
+# subcommand that needs them.
+
+TABLE_FORMATS = ("json", "csv", "parquet")
+
+
+def fail(message):
+    print(f"stablesim: error: {message}", file=sys.stderr)
+    return 2
+
+
+def resolve(registry, banner):
+    name = registry.resolve_banner(banner)
+    if name is None:
+        raise ValueError(f"unknown banner: {banner}")
+    return name
+
+
+def positive_int(text):
+    # argparse type for counts: pulls, players, workers
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a whole number: {text}") from None
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1: {text}")
+    return value
+
+
+def parse_counters(registry, banner, text):
+    # starting pity, comma separated in rule order
+    labels = registry.pity[banner].labels
+    try:
+        counters = [int(c) for c in text.split(",")]
+    except ValueError:
+        raise ValueError("--counters must be whole numbers, comma separated") from None
+    if len(counters) != len(labels):
+        raise ValueError(f"{banner} needs {len(labels)} pity counters: {', '.join(labels) or 'none'}")
+    if any(c < 0 for c in counters):
+        raise ValueError("--counters must not be negative")
+    return counters
+
+
+def format_for(path, fmt):
+    if fmt:
+        return fmt
+    if path and str(path).endswith(".csv.gz"):
+        return "csv.gz"
+    if path and Path(path).suffix in (".csv", ".parquet"):
+        return Path(path).suffix[1:]
+    return "json"
+
+
+# ---------- OUTPUT ----------
+
+def write_json(data, output=None):
+    # no NaN or Infinity: undefined values are written as null
+    text = json.dumps(data, indent=2, default=float, allow_nan=False)
+    if output:
+        Path(output).write_text(text + "\n")
+    else:
+        print(text)
+
+
+def write_table(rows, output=None, fmt=None):
+    # rows: list of flat dicts sharing keys
+    fmt = format_for(output, fmt)
+    if fmt == "json":
+        return write_json(rows, output)
+
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=list(rows[0]) if rows else [])
+        writer.writeheader()
+        writer.writerows(rows)
+        if output:
+            Path(output).write_text(buffer.getvalue())
+        else:
+            sys.stdout.write(buffer.getvalue())
+        return
+
+    if fmt == "parquet":
+        if not output:
+            raise ValueError("parquet output needs --output")
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)") from None
+        pq.write_table(pa.Table.from_pylist(rows), output)
+        return
+
+    raise ValueError(f"unknown table format: {fmt}")
+
+
+# ---------- PULL ----------
+
+def cmd_pull(args):
+    from stablesim.core import Simulator, SimulatorState, default_registry
+
+    registry = default_registry()
+    banner = resolve(registry, args.banner)
+    sim = Simulator(registry, SimulatorState(seed=args.seed))
+    sim.multi_pull(banner, args.pulls, args.highlight)
+
+    fmt = format_for(args.output, args.format)
+    if fmt != "json":
+        from stablesim.export import write_export
+        if not args.output:
+            raise ValueError(f"{fmt} output needs --output")
+        write_export(sim.state.history, args.output, fmt)
+        return
+
+    stats = sim.state.stats
+    write_json({
+        "banner": banner,
+        "pulls": args.pulls,
+        "seed": sim.state.stream.seed,
+        "pity": dict(zip(registry.pity[banner].labels, sim.counters(banner))),
+        "rarities": stats.rarity_rows(),
+        "top": stats.top(args.top),
+    }, args.output)
+
+
+# ---------- UNTIL ----------
+
+def cmd_until(args):
+    from stablesim.campaign import run_campaign
+
+    result = run_campaign(
+        args.banner, args.targets, args.players, seed=args.seed,
+        workers=args.workers, max_pulls=args.max_pulls, collect=args.all,
+    )
+    summary = result.summary()
+    if args.cdf:
+        summary["cdf"] = result.cdf().tolist()
+    write_json(summary, args.output)
+
+
+# ---------- ODDS ----------
+
+def cmd_odds(args):
+    from stablesim.core import default_registry
+    from stablesim.odds import odds_report
+
+    registry = default_registry()
+    banner = resolve(registry, args.banner)
+    counters = parse_counters(registry, banner, args.counters) if args.counters else None
+    write_json(odds_report(registry, banner, args.targets, counters), args.output)
+
+
+# ---------- CAMPAIGN ----------
+
+def read_jobs(path):
+    from stablesim.catalog import read_catalog
+    data = read_catalog(path)
+    jobs = data.get("jobs") if isinstance(data, dict) else data
+    if not isinstance(jobs, list) or not jobs:
+        raise ValueError(f"{path}: expected a non-empty 'jobs' list")
+    return jobs
+
+
+def check_job(n, job, args):
+    # one job of a campaign file, checked like an API /until body;
+    # returns run_campaign arguments with the command line's defaults filled in
+    def bad(message):
+        raise ValueError(f"job {n}: {message}")
+
+    def whole(key, default, low):
+        value = job.get(key, default)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, int) or value < low):
+            bad(f"'{key}' must be a whole number of at least {low}")
+        return value
+
+    if not isinstance(job, dict):
+        bad("must be a table")
+    for key in ("banner", "targets"):
+        if key not in job:
+            bad(f"missing '{key}'")
+    if not isinstance(job["banner"], str):
+        bad("'banner' must be a string")
+    targets = job["targets"]
+    if not isinstance(targets, list) or not targets:
+        bad("'targets' must be a non-empty list")
+    for target in targets:
+        # an item name or rarity, or a [name, rarity] pair
+        pair = isinstance(target, list) and len(target) == 2
+        if not (isinstance(target, str) or pair and all(isinstance(t, str) for t in target)):
+            bad(f"bad target {json.dumps(target)}: expected a name, a rarity or [name, rarity]")
+    collect = job.get("all", False)
+    if not isinstance(collect, bool):
+        bad("'all' must be true or false")
+
+    return {
+        "banner": job["banner"],
+        "targets": targets,
+        "players": whole("players", args.players, 1),
+        "seed": whole("seed", args.seed, 0),
+        "max_pulls": whole("max_pulls", args.max_pulls, 1),
+        "collect": collect,
+    }
+
+
+def cmd_campaign(args):
+    from stablesim.campaign import run_campaign
+
+    # every job is checked before the first one runs
+    jobs = [check_job(n, job, args) for n, job in enumerate(read_jobs(args.jobs), 1)]
+    results = []
+    for job in jobs:
+        results.append(run_campaign(**job, workers=args.workers).summary())
+    write_json(results, args.output)
+
+
+# ---------- EXPORT ----------
+
+def report_odds(registry):
+    rows = []
+    for banner in registry.banners:
+        chain = registry.exact_odds(banner)
+        for rarity, rate in chain.rarity_rates().items():
+            rows.append({"banner": banner, "rarity": rarity, "rate": rate})
+    return rows
+
+
+def report_values(registry):
+    from stablesim.valuation import rank_banners
+    return rank_banners(registry)
+
+
+def report_completion(registry):
+    from stablesim.completion import completion_table
+    keys = ("banner", "rarity", "items", "method", "expected", "p90", "missed")
+    return [{k: e.get(k) for k in keys} for e in completion_table(registry)]
+
+
+def report_conformance(registry):
+    from stablesim.conformance import run_conformance
+    keys = ("banner", "test", "stat", "p", "status")
+    return [{k: r.get(k) for k in keys} for r in run_conformance(registry=registry)]
+
+
+REPORTS = {
+    "odds": report_odds,
+    "values": report_values,
+    "completion": report_completion,
+    "conformance": report_conformance,
+}
+
+
+def cmd_export(args):
+    from stablesim.core import default_registry
+    rows = REPORTS[args.report](default_registry())
+    write_table(rows, args.output, args.format)
+    if args.report == "conformance" and any(r["status"] == "fail" for r in rows):
+        return 1
+
+
+# ---------- SERVE ----------
+
+def cmd_serve(args):
+    import os
+    from stablesim.api import SimulationAPI
+    from stablesim.cache import ResultCache
+    try:
+        import uvicorn
+    except ImportError:
+        raise RuntimeError("the HTTP API needs an ASGI server (pip install uvicorn)") from None
+
+    cache = ResultCache(path=os.environ.get("STABLESIM_RESULT_CACHE"))
+    app = SimulationAPI(cache=cache, seed=args.seed, window=args.window)
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+# ---------- CONFORMANCE ----------
+
+def cmd_conformance(args):
+    from stablesim.conformance import format_result, run_conformance
+
+    # options left out keep the harness defaults
+    options = {k: getattr(args, k) for k in ("pulls", "players", "seed", "alpha") if getattr(args, k) is not None}
+    results = run_conformance(args.banners, **options)
+    if args.json:
+        write_json(results)
+    else:
+        for r in results:
+            print(format_result(r))
+    if any(r["status"] == "fail" for r in results):
+        return 1
+
+
+# =========================
+# PARSER
+# =========================
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="stablesim", description="Headless StableSim engine.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("pull", help="simulate pulls on one banner")
+    p.add_argument("banner")
+    p.add_argument("pulls", type=positive_int)
+    p.add_argument("--seed", type=int)
+    p.add_argument("--highlight", nargs="*", default=[], help="names marked * in exports")
+    p.add_argument("--top", type=int, default=10)
+    p.add_argument("--format", choices=("json", "csv", "csv.gz", "parquet"),
+                   help="json summary (default) or a full pull-by-pull export")
+    p.add_argument("--output", "-o")
+    p.set_defaults(run=cmd_pull)
+
+    p = sub.add_parser("until", help="pulls until a target item, rarity or full set")
+    p.add_argument("banner")
+    p.add_argument("targets", nargs="+", help="item names or rarities")
+    p.add_argument("--all", action="store_true", help="until one of every target")
+    p.add_argument("--players", type=positive_int, default=100_000)
+    p.add_argument("--seed", type=int)
+    p.add_argument("--workers", type=positive_int, default=1)
+    p.add_argument("--max-pulls", type=positive_int, default=10_000)
+    p.add_argument("--cdf", action="store_true", help="include the share done by each pull count")
+    p.add_argument("--output", "-o")
+    p.set_defaults(run=cmd_until)
+
+    p = sub.add_parser("odds", help="exact long-run odds of one banner")
+    p.add_argument("banner")
+    p.add_argument("targets", nargs="*", help="item names or rarities to get pull counts for")
+    p.add_argument("--counters", help="starting pity counters, comma separated in rule order")
+    p.add_argument("--output", "-o")
+    p.set_defaults(run=cmd_odds)
+
+    p = sub.add_parser("campaign", help="run a file of until-jobs")
+    p.add_argument("jobs", help='TOML/JSON with jobs = [{banner, targets, players?, seed?, max_pulls?, all?}]')
+    p.add_argument("--players", type=positive_int, default=100_000)
+    p.add_argument("--seed", type=int)
+    p.add_argument("--workers", type=positive_int, default=1)
+    p.add_argument("--max-pulls", type=positive_int, default=10_000)
+    p.add_argument("--output", "-o")
+    p.set_defaults(run=cmd_campaign)
+
+    p = sub.add_parser("export", help="write a report table for every banner")
+    p.add_argument("report", choices=sorted(REPORTS))
+    p.add_argument("--format", choices=TABLE_FORMATS)
+    p.add_argument("--output", "-o")
+    p.set_defaults(run=cmd_export)
+
+    p = sub.add_parser("conformance", help="check simulated odds against the catalogs")
+    p.add_argument("banners", nargs="*", help="banner names or aliases; default all")
+    p.add_argument("--pulls", type=positive_int)
+    p.add_argument("--players", type=positive_int)
+    p.add_argument("--seed", type=int)
+    p.add_argument("--alpha", type=float)
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(run=cmd_conformance)
+
+    p = sub.add_parser("serve", help="serve the HTTP API")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8000)
+    p.add_argument("--seed", type=int, help="seed of the server's stream for unseeded pulls")
+    p.add_argument("--window", type=float, default=0.0,
+                   help="seconds to hold a pull batch open for more requests")
+    p.set_defaults(run=cmd_serve)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.run(args) or 0
+    except BrokenPipeError:
+        # output piped into head & co.
+        return 0
+    except (ValueError, RuntimeError, OSError) as e:
+        return fail(e)
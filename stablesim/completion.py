@@ -0,0 +1,86 @@
+import numpy as np
+
+from stablesim.campaign import run_campaign
+
+# =========================
+# COLLECTION COMPLETION
+# =========================
+# Expected pulls to own one of every (name, rarity) in a tier. Without
+# pity, draws are i.i.d. and the unequal-probability coupon collector has
+# an exact answer (Flajolet et al.):
+#
+#   E[T] = integral_0^inf  1 - prod_i (1 - exp(-p_i t))  dt
+#
+# Pity makes draws depend on the counters. A tier of one item is still
+# exact: it is the expected wait for that item in the banner's pity
+# chain. Larger tiers have no closed form and fall back to a seeded
+# Monte-Carlo full-set run through the lockstep players engine.
+
+GRID = 200_001
+PLAYERS = 1_000
+SEED = 0
+
+
+def tier_probabilities(sampler, rarity):
+    total = sum(sampler.weights)
+    return np.array([
+        weight / total for (_, r), (_, weight) in sampler.index.items() if r == rarity
+    ])
+
+
+def coupon_expectation(p, eps=1e-12):
+    p = np.asarray(p, dtype=float)
+    end = np.log(len(p) / eps) / p.min()
+    t = np.linspace(0.0, end, GRID)
+    # sum of logs instead of the product: thousands of factors near 1
+    log_all = np.zeros(len(t))
+    for pi in p:
+        log_all += np.log(-np.expm1(-pi * np.maximum(t, 1e-300)))
+    missing = -np.expm1(log_all)
+    # trapezoid rule on the even grid
+    return float((missing.sum() - (missing[0] + missing[-1]) / 2) * (t[1] - t[0]))
+
+
+def has_pity(pity):
+    return bool(pity.order)
+
+
+def completion_estimate(registry, banner, rarity, players=PLAYERS, seed=SEED, cache=None):
+    sampler = registry.samplers[banner]
+    pity = registry.pity[banner]
+    p = tier_probabilities(sampler, rarity)
+    if not len(p):
+        raise ValueError(f"{banner} has no {rarity} items")
+
+    estimate = {"banner": banner, "rarity": rarity, "items": len(p)}
+    if not has_pity(pity):
+        return {**estimate, "method": "exact", "expected": coupon_expectation(p)}
+    if len(p) == 1:
+        ids = [ids for (_, r), (ids, _) in sampler.index.items() if r == rarity][0]
+        expected = registry.exact_odds(banner).expected_pulls(list(ids))
+        return {**estimate, "method": "exact", "expected": expected}
+
+    # budget from the pity-free answer at long-run rates, so runs rarely cut off
+    rates = registry.effective_chances(banner)
+    tier = [rates[ids[0]] / 100 for (_, r), (ids, _) in sampler.index.items() if r == rarity]
+    budget = int(coupon_expectation(tier) * 10) + 100
+
+    result = run_campaign(
+        banner, [rarity], players, seed=seed, workers=1,
+        max_pulls=budget, cache=cache, collect=True, registry=registry,
+    )
+    return {
+        **estimate,
+        "method": "monte-carlo",
+        "expected": result.mean(),
+        "p90": result.percentile(90),
+        "missed": result.missed,
+    }
+
+
+def completion_table(registry, players=PLAYERS, seed=SEED, cache=None):
+    return [
+        completion_estimate(registry, banner, rarity, players, seed, cache)
+        for banner, sampler in registry.samplers.items()
+        for rarity in sampler.rarity_names
+    ]
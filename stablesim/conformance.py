@@ -0,0 +1,168 @@
+import math
+
+import numpy as np
+
+from stablesim.batch import batch_pull, pulls_until
+from stablesim.catalog import WEIGHT_TOLERANCE
+from stablesim.core import default_registry
+
+# =========================
+# CONFORMANCE
+# =========================
+# Seeded large simulations through the batch engine, tested against what
+# each banner declares:
+#
+#   rarity    chi-square, rarity counts vs the pity chain's long-run rates
+#   items     chi-square, item counts vs the pity chain's long-run rates
+#   weights   chi-square, organic (non-pity) draws vs the catalog weights
+#   pulls     KS, pulls until the first target vs the chain's exact CDF
+#   sum       flag only: catalog weights that don't add up to 100%
+#
+# Every banner gets its own child of the seed, so one banner's result
+# doesn't depend on which others were checked alongside it.
+
+PULLS = 1_000_000
+PLAYERS = 100_000
+ALPHA = 1e-4
+MIN_EXPECTED = 5
+
+
+# ---------- TESTS ----------
+
+def chi_square_p(stat, dof):
+    # upper tail via the Wilson-Hilferty cube-root normal approximation
+    if dof <= 0:
+        return 1.0
+    z = ((stat / dof) ** (1 / 3) - (1 - 2 / (9 * dof))) / math.sqrt(2 / (9 * dof))
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def chi_square(observed, expected):
+    # cells expected below MIN_EXPECTED are pooled into one so rare items
+    # don't blow up the statistic
+    observed = np.asarray(observed, dtype=float)
+    expected = np.asarray(expected, dtype=float)
+    small = expected < MIN_EXPECTED
+    if small.any():
+        observed = np.r_[observed[~small], observed[small].sum()]
+        expected = np.r_[expected[~small], expected[small].sum()]
+    keep = expected > 0
+    stat = float(((observed[keep] - expected[keep]) ** 2 / expected[keep]).sum())
+    dof = int(keep.sum()) - 1
+    return stat, dof, chi_square_p(stat, dof)
+
+
+def ks_p(d, n):
+    # asymptotic Kolmogorov distribution with Stephens' small-n correction
+    if n == 0:
+        return 1.0
+    lam = (math.sqrt(n) + 0.12 + 0.11 / math.sqrt(n)) * d
+    if lam < 0.2:
+        return 1.0
+    return min(1.0, max(0.0, 2 * sum(
+        (-1) ** (k - 1) * math.exp(-2 * k * k * lam * lam) for k in range(1, 101)
+    )))
+
+
+def ks_test(needed, cdf):
+    # `needed` uses 0 for "not reached"; those only count against the tail
+    counts = np.bincount(needed[needed > 0], minlength=len(cdf) + 1)[1:len(cdf) + 1]
+    empirical = np.cumsum(counts) / len(needed)
+    d = float(np.abs(empirical - cdf).max()) if len(cdf) else 0.0
+    return d, ks_p(d, len(needed))
+
+
+# ---------- BANNER ----------
+
+def default_targets(sampler):
+    # featured items, else the lowest-weight rarity
+    if sampler.featured:
+        return list(sampler.featured)
+    totals = {}
+    for code, weight in zip(sampler.rarity_codes, sampler.weights):
+        totals[code] = totals.get(code, 0) + weight
+    rarest = min(totals, key=totals.get)
+    return [i for i, code in enumerate(sampler.rarity_codes) if code == rarest]
+
+
+def result(banner, test, stat, p, alpha, **extra):
+    return {
+        "banner": banner, "test": test, "stat": stat, "p": p,
+        "status": "pass" if p >= alpha else "fail", **extra,
+    }
+
+
+def check_banner(registry, banner, pulls=PULLS, players=PLAYERS, seed=0, alpha=ALPHA):
+    sampler = registry.samplers[banner]
+    pity = registry.pity[banner]
+    chain = registry.exact_odds(banner)
+    index = list(registry.banners).index(banner)
+    draw_rng, until_rng = (
+        np.random.default_rng(s) for s in np.random.SeedSequence([seed, index]).spawn(2)
+    )
+    results = []
+
+    total = sum(sampler.weights)
+    results.append({
+        "banner": banner, "test": "sum", "stat": round(total, 4), "p": None,
+        "status": "flag" if abs(total - 100) > WEIGHT_TOLERANCE else "pass",
+    })
+
+    picks, codes, forced, _ = batch_pull(sampler, pity, pulls, rng=draw_rng)
+    item_rates = chain.item_rates()
+
+    rarity_rates = chain.rarity_rates()
+    stat, dof, p = chi_square(
+        np.bincount(codes, minlength=len(sampler.rarity_names)),
+        [rarity_rates[r] * pulls for r in sampler.rarity_names],
+    )
+    results.append(result(banner, "rarity", stat, p, alpha, dof=dof))
+
+    stat, dof, p = chi_square(
+        np.bincount(picks, minlength=len(sampler.items)), item_rates * pulls,
+    )
+    results.append(result(banner, "items", stat, p, alpha, dof=dof))
+
+    organic = picks[~forced]
+    weights = np.asarray(sampler.weights, dtype=float)
+    stat, dof, p = chi_square(
+        np.bincount(organic, minlength=len(sampler.items)),
+        weights / weights.sum() * len(organic),
+    )
+    results.append(result(banner, "weights", stat, p, alpha, dof=dof, draws=len(organic)))
+
+    targets = default_targets(sampler)
+    cdf = chain.pulls_cdf(targets)
+    needed = pulls_until(sampler, pity, players, targets, rng=until_rng, max_pulls=len(cdf))
+    d, p = ks_test(needed, cdf)
+    results.append(result(
+        banner, "pulls", d, p, alpha,
+        players=players, targets=sorted({sampler.names[i] for i in targets}),
+    ))
+
+    return results
+
+
+def run_conformance(banners=None, pulls=PULLS, players=PLAYERS, seed=0, alpha=ALPHA, registry=None):
+    registry = registry or default_registry()
+    names = []
+    for banner in banners or registry.banners:
+        name = registry.resolve_banner(banner)
+        if name is None:
+            raise ValueError(f"unknown banner: {banner}")
+        names.append(name)
+
+    results = []
+    for name in names:
+        results.extend(check_banner(registry, name, pulls, players, seed, alpha))
+    return results
+
+
+def format_result(r):
+    if r["test"] == "sum":
+        detail = f"weights sum to {r['stat']:.2f}%"
+    elif r["test"] == "pulls":
+        detail = f"D={r['stat']:.5f}  p={r['p']:.4f}"
+    else:
+        detail = f"chi2={r['stat']:9.2f} dof={r['dof']:<4} p={r['p']:.4f}"
+    return f"{r['banner']:<24} {r['test']:<8} {detail:<40} {r['status'].upper()}"
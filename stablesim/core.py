@@ -0,0 +1,236 @@
+import os
+from functools import lru_cache
+
+from stablesim.banners import CATALOG_DIR, normalize
+from stablesim.cache import catalog_hash
+from stablesim.catalog import catalog_paths, load_catalog
+from stablesim.pity import PityStates, compile_banner
+from stablesim.rng import PullStream
+
+# =========================
+# BANNER REGISTRY
+# =========================
+
+class BannerRegistry:
+    __slots__ = (
+        "banners", "archived", "aliases", "samplers", "pity", "chains",
+        "effective", "hashes", "costs", "warnings", "frozen",
+    )
+
+    def __init__(self):
+        self.banners = {}
+        self.archived = set()
+        self.aliases = {}
+        self.samplers = {}
+        self.pity = {}
+        self.chains = {}
+        self.effective = {}
+        self.hashes = {}
+        # currency per pull; catalogs without a cost count pulls
+        self.costs = {}
+        self.warnings = []
+        self.frozen = False
+
+    def register_banner(self, name, items, aliases=None, archived=False, pity=None,
+                        featured=None, sampler=None, cost=None):
+        if self.frozen:
+            raise RuntimeError("banner registry is frozen; build a new one to add banners")
+
+        self.banners[name] = tuple(items)
+        self.samplers[name], self.pity[name] = compile_banner(name, items, pity, featured, sampler)
+        self.hashes[name] = catalog_hash(self.samplers[name], self.pity[name])
+        self.costs[name] = cost if cost is not None else 1
+        self.chains.pop(name, None)
+        self.effective.pop(name, None)
+
+        if archived:
+            self.archived.add(name)
+
+        if aliases:
+            for a in aliases:
+                self.aliases[normalize(a)] = name
+
+        self.aliases[normalize(name)] = name
+
+    def freeze(self):
+        # shared registries are read-only; only the lazy odds cache still fills in
+        self.archived = frozenset(self.archived)
+        self.frozen = True
+        return self
+
+    def resolve_banner(self, input_name):
+        return self.aliases.get(normalize(input_name))
+
+    def exact_odds(self, banner):
+        if banner not in self.chains:
+            from stablesim.odds import PityChain
+            self.chains[banner] = PityChain(self.samplers[banner], self.pity[banner])
+        return self.chains[banner]
+
+    def effective_chances(self, banner):
+        # long-run % per item id with pity included, summed per (name, rarity)
+        # like the nominal chances
+        if banner not in self.effective:
+            sampler = self.samplers[banner]
+            rates = self.exact_odds(banner).item_rates()
+            chances = [0.0] * len(sampler.items)
+            for ids, _ in sampler.index.values():
+                rate = float(rates[list(ids)].sum()) * 100
+                for i in ids:
+                    chances[i] = rate
+            self.effective[banner] = tuple(chances)
+        return self.effective[banner]
+
+
+def load_registry(directory, use_cache=True):
+    registry = BannerRegistry()
+    for path in catalog_paths(directory):
+        spec, sampler, warnings = load_catalog(path, use_cache)
+        registry.register_banner(**spec, sampler=sampler)
+        registry.warnings.extend(warnings)
+    return registry.freeze()
+
+
+@lru_cache(maxsize=None)
+def default_registry():
+    # built once per process and shared by every simulator in it
+    return load_registry(os.environ.get("STABLESIM_CATALOGS", CATALOG_DIR))
+
+
+# =========================
+# SIMULATOR
+# =========================
+# The registry and a fresh session are plain Python. The numpy engine
+# (batch draws, history columns, running stats) is imported on the first
+# pull, so a cold start only pays for what the first page shows.
+
+class SimulatorState:
+    __slots__ = (
+        "pity", "persist_pity", "stream", "_stats", "_history", "last_results",
+    )
+
+    def __init__(self, seed=None):
+        self.pity = PityStates()
+        self.persist_pity = True
+        # one RNG per session, never the module-level one
+        self.stream = PullStream(seed)
+        self._stats = None
+        # every pull of the session; last_results is a view of the last batch
+        self._history = None
+        self.last_results = None
+
+    @property
+    def stats(self):
+        if self._stats is None:
+            from stablesim.stats import RunningStats
+            self._stats = RunningStats()
+        return self._stats
+
+    @property
+    def history(self):
+        if self._history is None:
+            from stablesim.history import PullHistory
+            self._history = PullHistory()
+        return self._history
+
+    def pulled(self):
+        # any pulls this session, without loading the engine to find out
+        return self._stats is not None and bool(self._stats)
+
+
+class Simulator:
+    __slots__ = ("registry", "state", "cache")
+
+    def __init__(self, registry, state=None, cache=None):
+        self.registry = registry
+        self.state = state if state is not None else SimulatorState()
+        # optional ResultCache, usually shared by every session
+        self.cache = cache
+
+    def reseed(self, seed=None):
+        self.state.stream = PullStream(seed)
+        return self.state.stream.seed
+
+    def counters(self, banner):
+        return self.state.pity.get(banner, len(self.registry.pity[banner]))
+
+    def reset_stats(self):
+        if self.state.pulled():
+            self.state.stats.clear()
+            self.state.history.clear()
+        self.state.last_results = None
+
+    # ---------- PULL LOGIC ----------
+
+    def pull_once(self, banner):
+        # returns the item id; names, rarities and chances are columns of the
+        # banner's sampler indexed by it
+        pity = self.registry.pity[banner]
+        counters = self.counters(banner)
+
+        idx, fired = pity.step(counters, self.state.stream.uniform())
+        return idx, fired >= 0, dict(zip(pity.labels, counters))
+
+    # ---------- BATCH DRAW ----------
+
+    def draw_batch(self, banner, amount, state):
+        # (picks, pity flags, per-item counts); advances `state` and the stream
+        import numpy as np
+        from stablesim.batch import batch_pull
+
+        stream = self.state.stream
+        # random session seeds never recur, so only user-chosen ones are cached
+        cache = self.cache if stream.seeded else None
+        key = (
+            self.registry.hashes[banner], amount,
+            stream.seed, stream.position, tuple(state),
+        )
+        cached = cache.get(key) if cache is not None else None
+
+        if cached is None:
+            sampler = self.registry.samplers[banner]
+            picks, _, pity_flags, state[:] = batch_pull(
+                sampler, self.registry.pity[banner], amount, state, rng=stream.take(amount))
+            cached = {
+                "picks": picks.astype(np.uint8 if len(sampler.items) <= 256 else np.uint16),
+                "pity": np.packbits(pity_flags),
+                "items": np.bincount(picks, minlength=len(sampler.items)),
+                "counters": tuple(state),
+            }
+            if cache is not None:
+                cache.put(key, cached)
+            return cached["picks"], pity_flags, cached["items"]
+
+        stream.seek(stream.position + amount)
+        state[:] = cached["counters"]
+        pity_flags = np.unpackbits(cached["pity"], count=amount).view(bool)
+        return cached["picks"], pity_flags, cached["items"]
+
+    # ---------- MULTI PULL ----------
+
+    def multi_pull(self, banner, amount, highlights=None, advanced=False, pity=None):
+        # `pity` replays a saved snapshot (or its label) instead of the live counters
+
+        highlights = highlights or []
+        session = self.state
+
+        if pity is not None:
+            session.pity.restore(pity)
+        elif not session.persist_pity:
+            session.pity.reset()
+
+        sampler = self.registry.samplers[banner]
+        state = self.counters(banner)
+        picks, pity_flags, item_counts = self.draw_batch(banner, amount, state)
+        session.stats.add(sampler, item_counts, self.registry.exact_odds(banner).item_rates())
+
+        # ---------- MARK (PITY / HIGHLIGHT) ----------
+        # per item, not per pull: a banner has far fewer items than pulls
+        starred = [
+            any(h.lower() in name.lower() for h in highlights)
+            for name in sampler.names
+        ]
+
+        start, stop, _ = session.history.append(sampler, picks, pity_flags, starred)
+        session.last_results = session.history.view(start, stop, advanced)
+        return session.last_results
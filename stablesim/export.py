@@ -0,0 +1,160 @@
+import csv
+import importlib.util
+import io
+import zlib
+
+import numpy as np
+
+from stablesim.history import MARKS
+
+# =========================
+# SESSION EXPORT
+# =========================
+# Exports walk the whole session history in fixed-size chunks and yield
+# encoded bytes as they go, so memory stays flat no matter how many pulls
+# the session holds. Nothing is built until someone asks for an export.
+
+CHUNK_ROWS = 50_000
+
+HEADERS = ["Pull", "Banner", "Item", "Rarity", "Chance", "Owned", "Mark"]
+
+FORMATS = {
+    "csv": "text/csv",
+    "csv.gz": "application/gzip",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def available_formats():
+    # looks pyarrow up without importing it; it loads when a parquet export runs
+    if importlib.util.find_spec("pyarrow") is None:
+        return ["csv", "csv.gz"]
+    return list(FORMATS)
+
+
+def history_chunks(history, chunk_rows=CHUNK_ROWS):
+    # (first pull number, item ids) per chunk; ids index the item table
+    items = history.column("item")
+    for start in range(0, len(items), chunk_rows):
+        yield start + 1, items[start:start + chunk_rows]
+
+
+def csv_chunks(history, chunk_rows=CHUNK_ROWS):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(HEADERS)
+
+    marks_col = history.column("mark")
+    owned_col = history.column("owned")
+
+    for first, items in history_chunks(history, chunk_rows):
+        stop = first - 1 + len(items)
+        writer.writerows(zip(
+            range(first, first + len(items)),
+            [history.banners[b] for b in history.item_banner[items].tolist()],
+            [history.names[n] for n in history.item_name[items].tolist()],
+            [history.rarities[r] for r in history.item_rarity[items].tolist()],
+            [history.item_chance[i] for i in items.tolist()],
+            owned_col[first - 1:stop].tolist(),
+            [MARKS[m] for m in marks_col[first - 1:stop].tolist()],
+        ))
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def gzip_chunks(history, chunk_rows=CHUNK_ROWS):
+    packer = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in csv_chunks(history, chunk_rows):
+        packed = packer.compress(chunk)
+        if packed:
+            yield packed
+    yield packer.flush()
+
+
+class ChunkSink:
+    # write-only file object that hands its bytes back after each row group
+    def __init__(self):
+        self.parts = []
+        self.closed = False
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b"".join(self.parts)
+        self.parts.clear()
+        return data
+
+
+def parquet_chunks(history, chunk_rows=CHUNK_ROWS):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)") from None
+
+    def dictionary(ids, values):
+        return pa.DictionaryArray.from_arrays(pa.array(ids, type=pa.int32()), pa.array(values, type=pa.string()))
+
+    schema = pa.schema([
+        ("Pull", pa.int64()),
+        ("Banner", pa.dictionary(pa.int32(), pa.string())),
+        ("Item", pa.dictionary(pa.int32(), pa.string())),
+        ("Rarity", pa.dictionary(pa.int32(), pa.string())),
+        ("Chance", pa.float64()),
+        ("Owned", pa.uint32()),
+        ("Mark", pa.dictionary(pa.int32(), pa.string())),
+    ])
+    chances = np.asarray(history.item_chance, dtype=np.float64)
+    marks_col = history.column("mark")
+    owned_col = history.column("owned")
+
+    sink = ChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema)
+    for first, items in history_chunks(history, chunk_rows):
+        stop = first - 1 + len(items)
+        table = pa.Table.from_arrays([
+            pa.array(np.arange(first, first + len(items), dtype=np.int64)),
+            dictionary(history.item_banner[items].astype(np.int32), history.banners),
+            dictionary(history.item_name[items].astype(np.int32), history.names),
+            dictionary(history.item_rarity[items].astype(np.int32), history.rarities),
+            pa.array(chances[items]),
+            pa.array(owned_col[first - 1:stop]),
+            dictionary(marks_col[first - 1:stop].astype(np.int32), MARKS),
+        ], schema=schema)
+        writer.write_table(table)
+        data = sink.take()
+        if data:
+            yield data
+    writer.close()
+    yield sink.take()
+
+
+EXPORTERS = {"csv": csv_chunks, "csv.gz": gzip_chunks, "parquet": parquet_chunks}
+
+
+def export_chunks(history, fmt="csv", chunk_rows=CHUNK_ROWS):
+    if fmt not in EXPORTERS:
+        raise ValueError(f"unknown export format: {fmt}")
+    return EXPORTERS[fmt](history, chunk_rows)
+
+
+def write_export(history, target, fmt="csv", chunk_rows=CHUNK_ROWS):
+    # `target` is a path or a binary file object
+    if hasattr(target, "write"):
+        for chunk in export_chunks(history, fmt, chunk_rows):
+            target.write(chunk)
+        return
+    with open(target, "wb") as f:
+        write_export(history, f, fmt, chunk_rows)
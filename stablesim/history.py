@@ -0,0 +1,171 @@
+import numpy as np
+
+# =========================
+# PULL HISTORY
+# =========================
+# Every pull of the session is one entry in a few parallel columns:
+#
+#   item    uint32  id into the history's item table (banner + item)
+#   rarity  uint8   id into `rarities`
+#   mark    uint8   PITY | HIGHLIGHT bits
+#   owned   uint32  how many of that item name the session had after it
+#
+# Names and rarity strings are interned once; rows of text are only built
+# for the slice someone actually looks at.
+
+PITY = 1
+HIGHLIGHT = 2
+
+MARKS = ["", "PITY", "*", "PITY*"]
+
+COLUMNS = {"item": np.uint32, "rarity": np.uint8, "mark": np.uint8, "owned": np.uint32}
+
+
+class PullHistory:
+    __slots__ = (
+        "names", "name_ids", "rarities", "rarity_ids", "banners",
+        "item_name", "item_rarity", "item_chance", "item_banner", "bases",
+        "name_counts", "batches", "chunks",
+    )
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.names = []
+        self.name_ids = {}
+        self.rarities = []
+        self.rarity_ids = {}
+        self.banners = []
+        # item table: one entry per (banner, item index)
+        self.item_name = np.zeros(0, dtype=np.uint32)
+        self.item_rarity = np.zeros(0, dtype=np.uint8)
+        self.item_chance = []
+        self.item_banner = np.zeros(0, dtype=np.uint16)
+        self.bases = {}
+        self.name_counts = np.zeros(0, dtype=np.int64)
+        # (banner, start, stop) per multi_pull
+        self.batches = []
+        self.chunks = {key: [] for key in COLUMNS}
+
+    def __len__(self):
+        return self.batches[-1][2] if self.batches else 0
+
+    # ---------- INTERNING ----------
+
+    def intern(self, table, ids, value):
+        if value not in ids:
+            ids[value] = len(table)
+            table.append(value)
+        return ids[value]
+
+    def banner_base(self, sampler):
+        base = self.bases.get(sampler.name)
+        if base is None:
+            base = self.bases[sampler.name] = len(self.item_chance)
+            self.item_banner = np.append(
+                self.item_banner, np.full(len(sampler.items), len(self.banners), dtype=np.uint16))
+            self.banners.append(sampler.name)
+            self.item_name = np.append(self.item_name, np.array(
+                [self.intern(self.names, self.name_ids, n) for n in sampler.names], dtype=np.uint32))
+            self.item_rarity = np.append(self.item_rarity, np.array(
+                [self.intern(self.rarities, self.rarity_ids, r) for r in sampler.rarities], dtype=np.uint8))
+            self.item_chance.extend(sampler.chances)
+            self.name_counts = np.append(
+                self.name_counts, np.zeros(len(self.names) - len(self.name_counts), dtype=np.int64))
+        return base
+
+    # ---------- APPEND ----------
+
+    def append(self, sampler, picks, pity_flags, starred):
+        items = picks.astype(np.uint32) + self.banner_base(sampler)
+        name_ids = self.item_name[items]
+
+        # running count per name: rank within the batch plus what came before
+        order = np.argsort(name_ids, kind="stable")
+        ranked = name_ids[order]
+        starts = np.flatnonzero(np.r_[True, ranked[1:] != ranked[:-1]])
+        rank = np.arange(len(ranked)) - np.repeat(starts, np.diff(np.r_[starts, len(ranked)]))
+        owned = np.empty(len(items), dtype=np.uint32)
+        owned[order] = self.name_counts[ranked] + rank + 1
+
+        batch_counts = np.bincount(name_ids, minlength=len(self.name_counts))
+        self.name_counts += batch_counts
+
+        marks = pity_flags.astype(np.uint8) * PITY
+        marks |= np.asarray(starred, dtype=bool)[picks].astype(np.uint8) * HIGHLIGHT
+
+        self.chunks["item"].append(items)
+        self.chunks["rarity"].append(self.item_rarity[items])
+        self.chunks["mark"].append(marks)
+        self.chunks["owned"].append(owned)
+
+        start = len(self)
+        self.batches.append((sampler.name, start, start + len(items)))
+        return start, start + len(items), batch_counts
+
+    def column(self, key):
+        chunks = self.chunks[key]
+        if not chunks:
+            return np.zeros(0, dtype=COLUMNS[key])
+        if len(chunks) > 1:
+            chunks[:] = [np.concatenate(chunks)]
+        return chunks[0]
+
+    def nbytes(self):
+        return sum(self.column(key).nbytes for key in COLUMNS)
+
+    # ---------- ROWS ----------
+
+    def rows(self, start, stop, advanced=False, first=1):
+        items = self.column("item")[start:stop]
+        names = [self.names[i] for i in self.item_name[items].tolist()]
+        rarities = [self.rarities[i] for i in self.column("rarity")[start:stop].tolist()]
+        marks = [MARKS[m] for m in self.column("mark")[start:stop].tolist()]
+        numbers = range(first, first + len(items))
+
+        if not advanced:
+            return [list(row) for row in zip(numbers, names, rarities, marks)]
+
+        chances = [self.item_chance[i] for i in items.tolist()]
+        owned = self.column("owned")[start:stop].tolist()
+        return [list(row) for row in zip(numbers, names, rarities, chances, owned, marks)]
+
+    def view(self, start, stop, advanced=False):
+        return HistoryView(self, start, stop, advanced)
+
+
+class HistoryView:
+    # list-like window over the history: len(), [i], [a:b] and iteration
+    # all return the same rows multi_pull used to build eagerly
+    __slots__ = ("history", "start", "stop", "advanced")
+
+    CHUNK = 10_000
+
+    def __init__(self, history, start, stop, advanced=False):
+        self.history = history
+        self.start = start
+        self.stop = stop
+        self.advanced = advanced
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __bool__(self):
+        return self.stop > self.start
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            a, b, step = key.indices(len(self))
+            if step != 1:
+                raise ValueError("history views only support contiguous slices")
+            return self.history.rows(self.start + a, self.start + max(a, b), self.advanced, a + 1)
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError(key)
+        return self[key:key + 1][0]
+
+    def __iter__(self):
+        for a in range(0, len(self), self.CHUNK):
+            yield from self[a:a + self.CHUNK]
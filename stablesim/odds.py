@@ -0,0 +1,213 @@
+import math
+
+import numpy as np
+
+# =========================
+# PITY MARKOV CHAIN
+# =========================
+# A state is the tuple of pity counters after a pull. Counters whose pool
+# is empty never fire and never change what is drawn, so they are left
+# out. A counter at threshold - 1 fires on the next pull whatever its
+# exact value, so every counter lives in range(threshold).
+
+class PityChain:
+
+    def __init__(self, banner, pity):
+        weights = np.asarray(banner.weights, dtype=np.float64)
+        self.banner = banner
+        self.p0 = weights / weights.sum()
+
+        self.active = [k for k in range(len(pity)) if pity.pools[k] is not None]
+        self.dims = np.array([pity.thresholds[k] for k in self.active], dtype=np.intp)
+        self.strides = np.ones(len(self.active), dtype=np.intp)
+        for a in range(len(self.active) - 2, -1, -1):
+            self.strides[a] = self.strides[a + 1] * self.dims[a + 1]
+
+        if self.active:
+            grid = np.indices(self.dims).reshape(len(self.active), -1).T
+        else:
+            grid = np.zeros((1, 0), dtype=np.intp)
+        self.size = len(grid)
+
+        inc = grid + 1
+        fires = inc >= self.dims
+        # first counter to fire wins, in rule order
+        first = np.argmax(np.column_stack([fires, np.ones(self.size, dtype=bool)]), axis=1)
+        self.fired = np.where(first < len(self.active), first, -1)
+        held = np.minimum(inc, self.dims - 1)
+
+        # forced pulls: the pool decides the item, the rule decides the next state
+        self.pool_probs = []
+        self.forced_next = np.zeros(self.size, dtype=np.intp)
+        for a, k in enumerate(self.active):
+            idx = np.asarray(pity.pools[k].keep, dtype=np.intp)
+            probs = np.zeros(len(weights))
+            probs[idx] = weights[idx] / weights[idx].sum()
+            self.pool_probs.append(probs)
+
+            mask = self.fired == a
+            nxt = held[mask]
+            for j in pity.resets[k]:
+                if j in self.active:
+                    nxt[:, self.active.index(j)] = 0
+            self.forced_next[mask] = self.encode(nxt)
+
+        # organic pulls: items that reset the same counters share a next state
+        sig = np.array(
+            [[pity.reset_on[k][i] for k in self.active] for i in range(len(weights))],
+            dtype=bool,
+        ).reshape(len(weights), len(self.active))
+        groups, self.item_group = np.unique(sig, axis=0, return_inverse=True)
+        self.item_group = self.item_group.ravel()
+        self.organic_next = np.zeros((self.size, len(groups)), dtype=np.intp)
+        for g, resets in enumerate(groups):
+            nxt = held.copy()
+            nxt[:, resets] = 0
+            self.organic_next[:, g] = self.encode(nxt)
+
+        self._stationary = None
+
+    def encode(self, counters):
+        return np.asarray(counters, dtype=np.intp) @ self.strides
+
+    def state_of(self, counters=None):
+        if counters is None:
+            return 0
+        values = [min(counters[k], self.dims[a] - 1) for a, k in enumerate(self.active)]
+        return int(self.encode([values])[0])
+
+    # ---------- TRANSITIONS ----------
+
+    def split(self, targets=()):
+        # per-state probability of hitting `targets`, plus the sparse
+        # transitions that miss them
+        hit_item = np.zeros(len(self.p0), dtype=bool)
+        hit_item[list(targets)] = True
+
+        miss = np.bincount(
+            self.item_group, weights=self.p0 * ~hit_item, minlength=self.organic_next.shape[1]
+        )
+        hit = np.zeros(self.size)
+
+        organic = np.flatnonzero(self.fired < 0)
+        hit[organic] = self.p0[hit_item].sum()
+        rows = [np.repeat(organic, len(miss))]
+        cols = [self.organic_next[organic].ravel()]
+        vals = [np.tile(miss, len(organic))]
+
+        for a, probs in enumerate(self.pool_probs):
+            forced = np.flatnonzero(self.fired == a)
+            p_hit = probs[hit_item].sum()
+            hit[forced] = p_hit
+            rows.append(forced)
+            cols.append(self.forced_next[forced])
+            vals.append(np.full(len(forced), 1.0 - p_hit))
+
+        return hit, np.concatenate(rows), np.concatenate(cols), np.concatenate(vals)
+
+    def matrix(self, targets=()):
+        hit, rows, cols, vals = self.split(targets)
+        q = np.zeros((self.size, self.size))
+        np.add.at(q, (rows, cols), vals)
+        return hit, q
+
+    # ---------- LONG-RUN RATES ----------
+
+    def stationary(self):
+        if self._stationary is None:
+            _, p = self.matrix()
+            a = p.T - np.eye(self.size)
+            a[-1] = 1.0
+            b = np.zeros(self.size)
+            b[-1] = 1.0
+            self._stationary = np.linalg.solve(a, b)
+        return self._stationary
+
+    def pity_rates(self):
+        pi = self.stationary()
+        return [pi[self.fired == a].sum() for a in range(len(self.active))]
+
+    def item_rates(self):
+        pi = self.stationary()
+        rates = pi[self.fired < 0].sum() * self.p0
+        for a, probs in enumerate(self.pool_probs):
+            rates = rates + pi[self.fired == a].sum() * probs
+        return rates
+
+    def rarity_rates(self):
+        rates = np.bincount(
+            self.banner.rarity_codes, weights=self.item_rates(),
+            minlength=len(self.banner.rarity_names),
+        )
+        return dict(zip(self.banner.rarity_names, rates.tolist()))
+
+    # ---------- PULLS UNTIL TARGET ----------
+
+    def expected_pulls(self, targets, counters=None):
+        hit, q = self.matrix(targets)
+        if not hit.any():
+            return float("inf")
+        try:
+            t = np.linalg.solve(np.eye(self.size) - q, np.ones(self.size))
+        except np.linalg.LinAlgError:
+            return float("inf")
+        return float(t[self.state_of(counters)])
+
+    def pulls_cdf(self, targets, counters=None, max_pulls=5000, tail=1e-4):
+        # cdf[n - 1] = P(target obtained within n pulls)
+        hit, rows, cols, vals = self.split(targets)
+        if not hit.any():
+            return np.zeros(0)
+
+        v = np.zeros(self.size)
+        v[self.state_of(counters)] = 1.0
+        cdf = []
+        got = 0.0
+        while len(cdf) < max_pulls and 1.0 - got > tail:
+            got += v @ hit
+            cdf.append(got)
+            v = np.bincount(cols, weights=v[rows] * vals, minlength=self.size)
+        return np.minimum(np.asarray(cdf), 1.0)
+
+
+def pulls_quantile(cdf, q):
+    n = int(np.searchsorted(cdf, q)) + 1
+    return n if n <= len(cdf) else None
+
+
+# =========================
+# REPORT
+# =========================
+# What `stablesim odds` and the HTTP API return for one banner.
+
+def odds_report(registry, banner, targets=None, counters=None):
+    sampler = registry.samplers[banner]
+    pity = registry.pity[banner]
+    chain = registry.exact_odds(banner)
+    effective = registry.effective_chances(banner)
+
+    report = {
+        "banner": banner,
+        "rarities": chain.rarity_rates(),
+        "pity": {pity.labels[k]: rate for k, rate in zip(chain.active, chain.pity_rates())},
+        "items": [
+            {"item": name, "rarity": rarity, "listed": weight, "effective": effective[ids[0]]}
+            for (name, rarity), (ids, weight) in sampler.index.items()
+        ],
+    }
+
+    if targets:
+        from stablesim.campaign import target_indices
+        ids = target_indices(sampler, targets)
+        cdf = chain.pulls_cdf(ids, counters)
+        expected = chain.expected_pulls(ids, counters)
+        report["target"] = {
+            "targets": list(targets),
+            "counters": counters,
+            # a target pity can't reach has no finite wait
+            "expected": expected if math.isfinite(expected) else None,
+            "p50": pulls_quantile(cdf, 0.5),
+            "p90": pulls_quantile(cdf, 0.9),
+            "p99": pulls_quantile(cdf, 0.99),
+        }
+    return report
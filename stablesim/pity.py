@@ -0,0 +1,121 @@
+from stablesim.sampler import CompiledBanner, pool_matches
+
+# =========================
+# PITY RULES
+# =========================
+# A banner's pity is a list of counter rules, checked in order:
+#
+#   {
+#       "counter": "legendary",            # name used by `resets`
+#       "label": "Legendary Pity",         # shown in pull info
+#       "threshold": 90,                   # fires when the counter reaches it
+#       "pool": {"rarities": [...]},       # what a forced pull draws from
+#       "reset_on": {"rarities": [...]},   # organic draws that zero it
+#       "resets": ["legendary", "epic"],   # counters zeroed when it fires
+#   }
+#
+# Pools and `reset_on` match items by "rarities" and/or "names".
+
+
+def compile_banner(name, items, pity=None, featured=None, sampler=None):
+    # `sampler` skips the alias-table build when one was already compiled
+    pity = pity or []
+    if sampler is None:
+        pools = {rule["counter"]: rule["pool"] for rule in pity}
+        sampler = CompiledBanner(name, items, pools, featured)
+    return sampler, CompiledPity(sampler, pity)
+
+
+# =========================
+# COMPILED RULES
+# =========================
+
+class CompiledPity:
+    __slots__ = (
+        "keys", "labels", "thresholds", "pools", "reset_on", "resets",
+        "table", "reset_by", "order", "_arrays",
+    )
+
+    def __init__(self, banner, rules=None):
+        rules = rules or []
+        self.keys = [r["counter"] for r in rules]
+        self.labels = [r.get("label", r["counter"]) for r in rules]
+        self.thresholds = [r["threshold"] for r in rules]
+        # None when the banner has nothing in that pool: the rule never fires
+        self.pools = [banner.pools.get(k) for k in self.keys]
+        # per counter: which item indices reset it on an organic draw
+        self.reset_on = [
+            [pool_matches(r["reset_on"], n, rar) for n, rar in zip(banner.names, banner.rarities)]
+            for r in rules
+        ]
+        self.resets = [[self.keys.index(k) for k in r["resets"]] for r in rules]
+
+        # scalar evaluator tables
+        self.table = banner.table
+        self.reset_by = [
+            [k for k in range(len(rules)) if self.reset_on[k][i]]
+            for i in range(len(banner.items))
+        ]
+        self.order = [k for k in range(len(rules)) if self.pools[k] is not None]
+        self._arrays = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def step(self, counters, u):
+        # one pull: bumps `counters` in place, returns (item index, fired rule or -1)
+        for k in range(len(counters)):
+            counters[k] += 1
+
+        for k in self.order:
+            if counters[k] >= self.thresholds[k]:
+                for j in self.resets[k]:
+                    counters[j] = 0
+                return self.pools[k].pick(u), k
+
+        i = self.table.pick(u)
+        for k in self.reset_by[i]:
+            counters[k] = 0
+        return i, -1
+
+
+# =========================
+# PITY STATE
+# =========================
+# Live counters for a session, one list per banner in rule order. Resetting
+# swaps in an empty dict, so it costs the same however many banners have
+# been pulled; counters come back as zeros the next time a banner is used.
+# Snapshots are hashable tuples of the non-zero banners and can be saved
+# under a label and replayed later.
+
+class PityStates:
+    __slots__ = ("counters", "saved")
+
+    def __init__(self):
+        self.counters = {}
+        self.saved = {}
+
+    def get(self, banner, size):
+        state = self.counters.get(banner)
+        if state is None:
+            state = self.counters[banner] = [0] * size
+        return state
+
+    def reset(self):
+        self.counters = {}
+
+    def snapshot(self):
+        return tuple(sorted(
+            (banner, tuple(state))
+            for banner, state in self.counters.items() if any(state)
+        ))
+
+    def restore(self, snapshot):
+        # `snapshot` is a snapshot tuple or the label it was saved under
+        if isinstance(snapshot, str):
+            snapshot = self.saved[snapshot]
+        self.counters = {banner: list(state) for banner, state in snapshot}
+
+    def save(self, label):
+        self.saved[label] = self.snapshot()
+        return self.saved[label]
@@ -0,0 +1,68 @@
+import html
+import re
+from collections import OrderedDict
+
+# =========================
+# HTML TABLES
+# =========================
+# Pull results can run to millions of rows, so the results view renders
+# one page at a time. Rendered pages are kept in a small LRU keyed by
+# page and page size; it empties itself when handed a new result list.
+
+def highlight_pattern(highlights):
+    keywords = sorted({h for h in highlights if h}, key=len, reverse=True)
+    if not keywords:
+        return None
+    return re.compile("|".join(re.escape(html.escape(k)) for k in keywords), re.IGNORECASE)
+
+
+class TableRenderer:
+    __slots__ = ("colors", "pattern", "pages", "rows", "max_pages")
+
+    def __init__(self, colors, highlights=(), max_pages=32):
+        self.colors = colors
+        self.pattern = highlight_pattern(highlights)
+        self.pages = OrderedDict()
+        self.rows = None
+        self.max_pages = max_pages
+
+    def cell(self, value, highlight=False):
+        display = html.escape(str(value))
+        color = self.colors.get(display)
+        if color:
+            return f"<td style='color:{color};font-weight:600'>{display}</td>"
+        if highlight and self.pattern is not None:
+            display = self.pattern.sub(r"<mark>\g<0></mark>", display)
+        return f"<td>{display}</td>"
+
+    def table(self, rows, headers, highlight_col=1):
+        parts = ["<table><tr>"]
+        parts.extend(f"<th>{h}</th>" for h in headers)
+        parts.append("</tr>")
+        for row in rows:
+            parts.append("<tr>")
+            parts.extend(self.cell(v, idx == highlight_col) for idx, v in enumerate(row))
+            parts.append("</tr>")
+        parts.append("</table>")
+        return "".join(parts)
+
+    def page(self, rows, headers, page, page_size):
+        if rows is not self.rows:
+            self.rows = rows
+            self.pages.clear()
+
+        key = (page, page_size, tuple(headers))
+        if key in self.pages:
+            self.pages.move_to_end(key)
+            return self.pages[key]
+
+        start = (page - 1) * page_size
+        rendered = self.table(rows[start:start + page_size], headers)
+        self.pages[key] = rendered
+        if len(self.pages) > self.max_pages:
+            self.pages.popitem(last=False)
+        return rendered
+
+
+def page_count(total, page_size):
+    return max(1, -(-total // page_size))
@@ -0,0 +1,59 @@
+import secrets
+
+# =========================
+# PULL STREAMS
+# =========================
+# Every engine consumes exactly one uniform per pull, and a PCG64 double
+# is exactly one step of the generator. So a seed plus a pull count pins
+# down the rest of a run: the scalar engine (pull_once), the batch engine
+# (multi_pull) and a replay from a saved offset all read the same numbers.
+# default_rng(seed) is the same stream, which keeps campaign shards and
+# conformance runs on the one convention.
+#
+# Nothing here touches numpy until the first draw: a session that only
+# renders the page never builds a generator.
+
+def new_seed():
+    # what SeedSequence() draws for its entropy
+    return secrets.randbits(128)
+
+
+def stream_at(seed, offset=0):
+    import numpy as np
+    bits = np.random.PCG64(seed)
+    if offset:
+        bits.advance(offset)
+    return np.random.Generator(bits)
+
+
+class PullStream:
+    __slots__ = ("seed", "seeded", "position", "rng")
+
+    def __init__(self, seed=None):
+        # seeded: the seed was chosen by the user, so the run can recur
+        self.seeded = seed is not None
+        self.seed = seed if seed is not None else new_seed()
+        self.position = 0
+        self.rng = None
+
+    def generator(self):
+        if self.rng is None:
+            self.rng = stream_at(self.seed, self.position)
+        return self.rng
+
+    def take(self, amount):
+        # generator positioned for the next `amount` pulls; the caller must
+        # draw exactly that many uniforms from it
+        rng = self.generator()
+        self.position += amount
+        return rng
+
+    def uniform(self):
+        rng = self.generator()
+        self.position += 1
+        return float(rng.random())
+
+    def seek(self, position):
+        # rebuilt at the new offset on the next draw
+        self.rng = None
+        self.position = position
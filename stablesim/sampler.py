@@ -0,0 +1,156 @@
+# =========================
+# ALIAS TABLES (Walker / Vose)
+# =========================
+
+class AliasTable:
+    __slots__ = ("size", "prob", "keep", "alias", "_arrays")
+
+    def __init__(self, weights, index=None):
+        n = len(weights)
+        index = list(index) if index is not None else list(range(n))
+        total = float(sum(weights))
+
+        if n == 0 or total <= 0:
+            raise ValueError("alias table needs at least one positive weight")
+
+        scaled = [w * n / total for w in weights]
+        prob = [1.0] * n
+        alias = list(range(n))
+
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] = (scaled[l] + scaled[s]) - 1.0
+            if scaled[l] < 1.0:
+                small.append(l)
+            else:
+                large.append(l)
+
+        # leftovers are 1.0 up to float error
+        for i in small + large:
+            prob[i] = 1.0
+
+        self.size = n
+        self.prob = prob
+        # columns hold item indices of the owning banner, not table slots
+        self.keep = index
+        self.alias = [index[a] for a in alias]
+        self._arrays = None
+
+    @classmethod
+    def restore(cls, prob, keep, alias):
+        # rebuild from saved columns (e.g. an mmap) without re-running Vose
+        table = cls.__new__(cls)
+        table.size = len(prob)
+        table.prob = prob.tolist()
+        table.keep = keep.tolist()
+        table.alias = alias.tolist()
+        table._arrays = (prob, keep, alias)
+        return table
+
+    def __getstate__(self):
+        # mmap views don't pickle; a worker process rebuilds the arrays
+        # from the list columns
+        return None, {"size": self.size, "prob": self.prob, "keep": self.keep,
+                      "alias": self.alias, "_arrays": None}
+
+    def pick(self, u):
+        x = u * self.size
+        i = int(x)
+        if i == self.size:
+            i -= 1
+        if x - i < self.prob[i]:
+            return self.keep[i]
+        return self.alias[i]
+
+
+# =========================
+# COMPILED BANNER
+# =========================
+
+def pool_matches(spec, name, rarity):
+    return rarity in spec.get("rarities", ()) or name in spec.get("names", ())
+
+
+def index_items(items):
+    # (name, rarity) -> (item ids, total weight). The same name can sit in
+    # several rarities (Tack "Bridle") and the same key can be listed twice
+    # (Majestic Friesians), so lookups never go by name alone.
+    ids = {}
+    for i, (name, rarity, _) in enumerate(items):
+        ids.setdefault((name, rarity), []).append(i)
+
+    index = {}
+    chances = [0.0] * len(items)
+    for key, members in ids.items():
+        weight = sum(items[i][2] for i in members)
+        index[key] = (tuple(members), weight)
+        for i in members:
+            chances[i] = round(weight, 2)
+    return index, tuple(chances)
+
+
+class CompiledBanner:
+    __slots__ = (
+        "name", "items", "names", "rarities", "weights",
+        "rarity_names", "rarity_codes", "index", "chances",
+        "table", "pools", "featured",
+    )
+
+    def __init__(self, name, items, pools=None, featured=None):
+        self.name = name
+        self.items = tuple(items)
+        self.names = tuple(n for n, _, _ in self.items)
+        self.rarities = tuple(r for _, r, _ in self.items)
+        self.weights = tuple(w for _, _, w in self.items)
+        self.rarity_names = tuple(dict.fromkeys(self.rarities))
+        self.rarity_codes = tuple(self.rarity_names.index(r) for r in self.rarities)
+        self.index, self.chances = index_items(self.items)
+        self.table = AliasTable(self.weights)
+
+        # pity sub-pools; empty pools are kept as None so callers can test them
+        self.pools = {}
+        for key, spec in (pools or {}).items():
+            idx = [
+                i for i, (n, r, _) in enumerate(self.items)
+                if pool_matches(spec, n, r)
+            ]
+            self.pools[key] = (
+                AliasTable([self.weights[i] for i in idx], idx) if idx else None
+            )
+
+        self.featured = tuple(
+            i for i, (n, r, _) in enumerate(self.items)
+            if featured and pool_matches(featured, n, r)
+        )
+
+    @classmethod
+    def restore(cls, name, items, table, pools, featured=None):
+        banner = cls.__new__(cls)
+        banner.name = name
+        banner.items = tuple(items)
+        banner.names = tuple(n for n, _, _ in banner.items)
+        banner.rarities = tuple(r for _, r, _ in banner.items)
+        banner.weights = tuple(w for _, _, w in banner.items)
+        banner.rarity_names = tuple(dict.fromkeys(banner.rarities))
+        banner.rarity_codes = tuple(banner.rarity_names.index(r) for r in banner.rarities)
+        banner.index, banner.chances = index_items(banner.items)
+        banner.table = table
+        banner.pools = dict(pools)
+        banner.featured = tuple(
+            i for i, (n, r, _) in enumerate(banner.items)
+            if featured and pool_matches(featured, n, r)
+        )
+        return banner
+
+    def item_ids(self, name, rarity):
+        entry = self.index.get((name, rarity))
+        return entry[0] if entry else ()
+
+    def has_pool(self, pool):
+        return self.pools.get(pool) is not None
@@ -0,0 +1,219 @@
+import math
+
+import numpy as np
+
+# =========================
+# RUNNING STATISTICS
+# =========================
+# Session totals, updated once per batch from the engine's per-item count
+# vector, so the cost of a batch depends on the banner's item count, not
+# on how many pulls it had.
+#
+# Expected counts come from each banner's long-run rates with pity, so
+# sessions mixing banners compare against the right mix. Leaders are a
+# top-K list kept up to date incrementally: counts only grow, so only
+# names touched by the latest batch can enter it.
+#
+# Counts are also partitioned: one vector per banner and one per batch,
+# indexed by the banner's item ids. view() sums the partitions it is
+# asked for, which touches item counts only, never the pull history.
+
+Z_95 = 1.959963984540054
+TOP_K = 50
+
+
+def wilson_interval(count, n, z=Z_95):
+    # 95% score interval for a proportion; well-behaved at 0 and n
+    count = np.asarray(count, dtype=float)
+    if n == 0:
+        return np.zeros_like(count), np.ones_like(count)
+    p = count / n
+    denom = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    half = z * np.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return centre - half, centre + half
+
+
+def rarity_rows(rarities, counts, expected, variance, n):
+    low, high = wilson_interval(counts, n)
+    rows = []
+    for code, rarity in enumerate(rarities):
+        count = int(counts[code])
+        sd = math.sqrt(variance[code])
+        rows.append({
+            "rarity": rarity,
+            "count": count,
+            "share": count / n if n else 0.0,
+            "low": float(low[code]),
+            "high": float(high[code]),
+            "expected": float(expected[code]) / n if n else 0.0,
+            "z": (count - float(expected[code])) / sd if sd else 0.0,
+        })
+    return rows
+
+
+class RunningStats:
+    __slots__ = (
+        "k", "total", "names", "name_ids", "rarities", "rarity_ids", "banners",
+        "name_counts", "rarity_counts", "rarity_expected", "rarity_variance", "leaders",
+        "rates", "partitions", "batches",
+    )
+
+    def __init__(self, k=TOP_K):
+        self.k = k
+        self.clear()
+
+    def clear(self):
+        self.total = 0
+        self.names = []
+        self.name_ids = {}
+        self.rarities = []
+        self.rarity_ids = {}
+        # banner -> (name id per item, rarity id per item)
+        self.banners = {}
+        # banner -> long-run rate per item id; pulls per item id
+        self.rates = {}
+        self.partitions = {}
+        # (banner, pulls per item id) for every batch, oldest first
+        self.batches = []
+        self.name_counts = np.zeros(0, dtype=np.int64)
+        self.rarity_counts = np.zeros(0, dtype=np.int64)
+        self.rarity_expected = np.zeros(0)
+        self.rarity_variance = np.zeros(0)
+        # name ids, highest count first
+        self.leaders = np.zeros(0, dtype=np.intp)
+
+    def __bool__(self):
+        return self.total > 0
+
+    def intern(self, table, ids, value):
+        if value not in ids:
+            ids[value] = len(table)
+            table.append(value)
+        return ids[value]
+
+    def banner_maps(self, sampler):
+        maps = self.banners.get(sampler.name)
+        if maps is None:
+            maps = self.banners[sampler.name] = (
+                np.array([self.intern(self.names, self.name_ids, n) for n in sampler.names], dtype=np.intp),
+                np.array([self.intern(self.rarities, self.rarity_ids, r) for r in sampler.rarities], dtype=np.intp),
+            )
+            grow = len(self.names) - len(self.name_counts)
+            self.name_counts = np.append(self.name_counts, np.zeros(grow, dtype=np.int64))
+            grow = len(self.rarities) - len(self.rarity_counts)
+            self.rarity_counts = np.append(self.rarity_counts, np.zeros(grow, dtype=np.int64))
+            self.rarity_expected = np.append(self.rarity_expected, np.zeros(grow))
+            self.rarity_variance = np.append(self.rarity_variance, np.zeros(grow))
+        return maps
+
+    # ---------- UPDATE ----------
+
+    def add(self, sampler, item_counts, rates):
+        # item_counts: pulls per item id of `sampler`; rates: long-run rate per item id
+        name_ids, rarity_ids = self.banner_maps(sampler)
+        item_counts = np.asarray(item_counts, dtype=np.int64)
+        amount = int(item_counts.sum())
+        size = len(self.rarities)
+
+        banner = sampler.name
+        self.rates[banner] = np.asarray(rates, dtype=float)
+        if banner in self.partitions:
+            self.partitions[banner] += item_counts
+        else:
+            self.partitions[banner] = item_counts.copy()
+        self.batches.append((banner, item_counts.astype(np.uint32)))
+
+        self.total += amount
+        self.rarity_counts += np.bincount(rarity_ids, weights=item_counts, minlength=size).astype(np.int64)
+        r = np.bincount(rarity_ids, weights=rates, minlength=size)
+        self.rarity_expected += amount * r
+        self.rarity_variance += amount * r * (1 - r)
+
+        np.add.at(self.name_counts, name_ids, item_counts)
+        self.update_leaders(np.unique(name_ids[item_counts > 0]))
+
+    def update_leaders(self, touched):
+        candidates = np.union1d(self.leaders, touched)
+        counts = self.name_counts[candidates]
+        if len(candidates) > self.k:
+            keep = np.argpartition(-counts, self.k - 1)[:self.k]
+            candidates, counts = candidates[keep], counts[keep]
+        # ties: first name seen wins, like a stable sort of the full table
+        self.leaders = candidates[np.lexsort((candidates, -counts))]
+
+    # ---------- READ ----------
+
+    def rarity_rows(self):
+        return rarity_rows(
+            self.rarities, self.rarity_counts, self.rarity_expected, self.rarity_variance, self.total,
+        )
+
+    def top(self, k=None):
+        ids = self.leaders[:k or self.k].tolist()
+        return [(self.names[i], int(self.name_counts[i])) for i in ids]
+
+    # ---------- PARTITIONS ----------
+
+    def batch_count(self):
+        return len(self.batches)
+
+    def view(self, banners=None, batches=None):
+        # banners: names to include (None = all); batches: batch indices
+        # (negative counts from the end). Both given = their intersection.
+        if batches is not None:
+            picked = [self.batches[i] for i in batches]
+            if banners is not None:
+                picked = [(b, c) for b, c in picked if b in banners]
+        else:
+            picked = [
+                (b, c) for b, c in self.partitions.items()
+                if banners is None or b in banners
+            ]
+        return StatsView(self, picked)
+
+
+class StatsView:
+    __slots__ = ("names", "rarities", "total", "name_counts", "rarity_counts",
+                 "rarity_expected", "rarity_variance", "banners", "k")
+
+    def __init__(self, stats, parts):
+        self.names = stats.names
+        self.rarities = stats.rarities
+        self.k = stats.k
+        self.banners = sorted({b for b, _ in parts}, key=list(stats.partitions).index)
+        self.name_counts = np.zeros(len(stats.names), dtype=np.int64)
+        self.rarity_counts = np.zeros(len(stats.rarities), dtype=np.int64)
+        self.rarity_expected = np.zeros(len(stats.rarities))
+        self.rarity_variance = np.zeros(len(stats.rarities))
+        self.total = 0
+
+        size = len(stats.rarities)
+        for banner, counts in parts:
+            name_ids, rarity_ids = stats.banners[banner]
+            counts = counts.astype(np.int64)
+            amount = int(counts.sum())
+            r = np.bincount(rarity_ids, weights=stats.rates[banner], minlength=size)
+            np.add.at(self.name_counts, name_ids, counts)
+            self.rarity_counts += np.bincount(rarity_ids, weights=counts, minlength=size).astype(np.int64)
+            self.rarity_expected += amount * r
+            self.rarity_variance += amount * r * (1 - r)
+            self.total += amount
+
+    def __bool__(self):
+        return self.total > 0
+
+    def rarity_rows(self):
+        # only rarities these partitions can produce
+        rows = rarity_rows(
+            self.rarities, self.rarity_counts, self.rarity_expected, self.rarity_variance, self.total,
+        )
+        return [row for row, e in zip(rows, self.rarity_expected) if e > 0 or row["count"]]
+
+    def top(self, k=None):
+        k = min(k or self.k, len(self.name_counts))
+        if not k:
+            return []
+        ids = np.argpartition(-self.name_counts, k - 1)[:k]
+        ids = ids[np.lexsort((ids, -self.name_counts[ids]))]
+        return [(self.names[i], int(self.name_counts[i])) for i in ids.tolist() if self.name_counts[i]]
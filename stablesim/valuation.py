@@ -0,0 +1,57 @@
+# =========================
+# BANNER VALUATION
+# =========================
+# Expected value of a pull: the long-run rate of every item with pity
+# included (from the banner's exact pity chain) times the value of its
+# rarity. Per currency unit divides by the banner's cost per pull.
+#
+# Results depend only on the compiled catalog, the cost and the value
+# table, so they are kept per (catalog hash, cost, values) for the life
+# of the process: after the first ranking, "Best Banner" is a lookup.
+
+RARITY_VALUES = {
+    "Rare": 1,
+    "Epic": 3,
+    "Legendary": 5,
+    "Fantasy": 2,
+    "Flying": 2,
+    "Featured Fantasy": 2,
+}
+DEFAULT_VALUE = 1
+
+VALUATIONS = {}
+
+
+def values_key(values):
+    return tuple(sorted(values.items()))
+
+
+def banner_value(registry, banner, values=None):
+    values = values if values is not None else RARITY_VALUES
+    cost = registry.costs[banner]
+    key = (registry.hashes[banner], cost, values_key(values))
+
+    if key not in VALUATIONS:
+        sampler = registry.samplers[banner]
+        worth = [values.get(r, DEFAULT_VALUE) for r in sampler.rarities]
+        rates = registry.exact_odds(banner).item_rates()
+        total = sum(sampler.weights)
+
+        per_pull = float(rates @ worth)
+        # what the same table would be worth with no pity at all
+        nominal = sum(w * v for w, v in zip(sampler.weights, worth)) / total
+        VALUATIONS[key] = {
+            "banner": banner,
+            "per_pull": per_pull,
+            "per_cost": per_pull / cost,
+            "cost": cost,
+            "pity_lift": per_pull / nominal - 1,
+        }
+    return VALUATIONS[key]
+
+
+def rank_banners(registry, values=None, by="per_cost"):
+    return sorted(
+        (banner_value(registry, banner, values) for banner in registry.banners),
+        key=lambda v: -v[by],
+    )